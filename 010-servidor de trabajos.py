@@ -0,0 +1,340 @@
+import cv2
+import os
+import json
+import sqlite3
+import subprocess
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+HOST = "127.0.0.1"
+PORT = 8765
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "jobs.sqlite3")
+NUM_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+
+# Rush jobs jump ahead of the bulk backlog
+PRIORITIES = {"rush": 10, "normal": 5, "bulk": 0}
+ALL_PRESETS = ("instagram", "tiktok", "youtube")
+
+def crop_center_square(frame):
+    height, width = frame.shape[:2]
+    min_dim = min(width, height)
+    start_x = (width - min_dim) // 2
+    start_y = (height - min_dim) // 2
+    return frame[start_y:start_y+min_dim, start_x:start_x+min_dim]
+
+def crop_center_vertical(frame):
+    height, width = frame.shape[:2]
+    new_width = height * 9 // 16  # Maintain aspect ratio for 1080x1920
+    start_x = (width - new_width) // 2
+    return frame[:, start_x:start_x+new_width]
+
+def calculate_bitrate(target_filesize_mb, duration_seconds):
+    target_filesize_bytes = target_filesize_mb * 1024 * 1024
+    target_bitrate_bps = (target_filesize_bytes * 8) / duration_seconds
+    return int(target_bitrate_bps)
+
+def process_video(input_path, output_folder, target_duration=60, max_filesize_mb=64, presets=ALL_PRESETS, progress_callback=None):
+    cap = cv2.VideoCapture(input_path)
+
+    # Get video properties
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    original_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    original_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    original_resolution = (original_width, original_height)
+    original_duration = frame_count / fps
+    frames_to_skip = max(1, int(original_duration / target_duration))
+
+    # Calculate target bitrate
+    target_bitrate = calculate_bitrate(max_filesize_mb, target_duration)
+
+    # Define output filenames
+    base_name = os.path.splitext(os.path.basename(input_path))[0]
+    instagram_output = os.path.join(output_folder, f"{base_name}_instagram_timelapse.mp4")
+    tiktok_output = os.path.join(output_folder, f"{base_name}_tiktok_timelapse.mp4")
+    youtube_output = os.path.join(output_folder, f"{base_name}_youtube_timelapse.mp4")
+
+    # Only open the writers for the requested presets
+    fourcc = cv2.VideoWriter_fourcc(*'avc1')  # H.264 codec, ensures web compatibility
+    out_instagram = cv2.VideoWriter(instagram_output, fourcc, fps, (1080, 1080)) if "instagram" in presets else None
+    out_tiktok = cv2.VideoWriter(tiktok_output, fourcc, fps, (1080, 1920)) if "tiktok" in presets else None
+    out_youtube = cv2.VideoWriter(youtube_output, fourcc, fps, original_resolution) if "youtube" in presets else None
+
+    current_frame = 0
+    processed_frames = 0
+    total_frames = max(1, frame_count // frames_to_skip)
+
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+
+        if current_frame % frames_to_skip == 0:
+            # Scale to 1080p if needed for Instagram and TikTok
+            scaled_frame = cv2.resize(frame, (1920, 1080)) if original_resolution != (1920, 1080) else frame
+
+            # Process Instagram video (1080x1080)
+            if out_instagram is not None:
+                cropped_square = crop_center_square(scaled_frame)
+                out_instagram.write(cv2.resize(cropped_square, (1080, 1080)))
+
+            # Process TikTok video (1080x1920)
+            if out_tiktok is not None:
+                cropped_vertical = crop_center_vertical(scaled_frame)
+                out_tiktok.write(cv2.resize(cropped_vertical, (1080, 1920)))
+
+            # Process YouTube video (original resolution)
+            if out_youtube is not None:
+                out_youtube.write(frame)
+
+            processed_frames += 1
+
+            # Report progress every 1% instead of drawing a tqdm bar
+            if progress_callback and processed_frames % max(1, total_frames // 100) == 0:
+                progress_callback(min(0.9, 0.9 * processed_frames / total_frames))
+
+        current_frame += 1
+
+    cap.release()
+    for out in (out_instagram, out_tiktok, out_youtube):
+        if out is not None:
+            out.release()
+
+    # Re-encode Instagram and TikTok videos with the target bitrate using ffmpeg
+    social_outputs = [f for f, p in ((instagram_output, "instagram"), (tiktok_output, "tiktok")) if p in presets]
+    failed_outputs = []
+    for output_file in social_outputs:
+        output_temp_file = output_file.replace('.mp4', '_temp.mp4')
+        os.rename(output_file, output_temp_file)
+
+        try:
+            subprocess.run(
+                [
+                    "ffmpeg", "-y", "-i", output_temp_file,
+                    "-b:v", str(target_bitrate),
+                    "-maxrate", str(target_bitrate),
+                    "-bufsize", str(target_bitrate),
+                    output_file
+                ],
+                check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+        except subprocess.CalledProcessError as e:
+            print(f"Error during ffmpeg processing: {e}")
+            os.rename(output_temp_file, output_file)  # Restore the original file if ffmpeg fails
+            failed_outputs.append(output_file)
+        finally:
+            if os.path.exists(output_temp_file):
+                os.remove(output_temp_file)  # Clean up the temp file
+
+    # Re-encode YouTube video with high quality to preserve original resolution
+    if "youtube" in presets:
+        output_temp_file = youtube_output.replace('.mp4', '_temp.mp4')
+        os.rename(youtube_output, output_temp_file)
+        try:
+            subprocess.run(
+                [
+                    "ffmpeg", "-y", "-i", output_temp_file,
+                    "-c:v", "libx264", "-crf", "18",  # CRF 18 ensures high quality
+                    "-preset", "slow",
+                    youtube_output
+                ],
+                check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+        except subprocess.CalledProcessError as e:
+            print(f"Error during ffmpeg processing for YouTube: {e}")
+            os.rename(output_temp_file, youtube_output)
+            failed_outputs.append(youtube_output)
+        finally:
+            if os.path.exists(output_temp_file):
+                os.remove(output_temp_file)
+
+    # The job must not be reported as done when a final encode is missing
+    if failed_outputs:
+        raise RuntimeError(f"ffmpeg re-encode failed for {', '.join(os.path.basename(f) for f in failed_outputs)}")
+
+    if progress_callback:
+        progress_callback(1.0)
+
+def open_db():
+    # One connection per thread; WAL lets the HTTP threads read while workers write
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+def init_db():
+    conn = open_db()
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            input_path TEXT NOT NULL,
+            output_folder TEXT NOT NULL,
+            presets TEXT NOT NULL,
+            target_duration REAL NOT NULL,
+            max_filesize_mb REAL NOT NULL,
+            priority INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            progress REAL NOT NULL DEFAULT 0,
+            error TEXT,
+            submitted_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, priority DESC, id)")
+    # Jobs that were running when the server died go back to the queue
+    conn.execute("UPDATE jobs SET status = 'queued', progress = 0 WHERE status = 'running'")
+    conn.commit()
+    conn.close()
+
+def job_to_dict(row):
+    job = dict(row)
+    job["presets"] = json.loads(job["presets"])
+    return job
+
+def submit_job(conn, params):
+    if not isinstance(params, dict):
+        raise ValueError("Expected a JSON object")
+    input_path = params["source"]
+    if not os.path.isfile(input_path):
+        raise ValueError(f"Source not found: {input_path}")
+    presets = params.get("presets", list(ALL_PRESETS))
+    if not isinstance(presets, list) or not presets:
+        raise ValueError("presets must be a non-empty list")
+    unknown = [p for p in presets if p not in ALL_PRESETS]
+    if unknown:
+        raise ValueError(f"Unknown presets: {unknown}")
+    priority = params.get("priority", "normal")
+    priority = PRIORITIES[priority] if isinstance(priority, str) else int(priority)
+    output_folder = params.get("output_folder") or os.path.join(os.path.dirname(input_path), "redes")
+    target_duration = float(params.get("target_duration", 60))
+    max_filesize_mb = float(params.get("max_filesize_mb", 64))
+    # Checked here so the client gets a 400 instead of a job that fails later in a worker
+    for name, value in (("target_duration", target_duration), ("max_filesize_mb", max_filesize_mb)):
+        if not 0 < value < float("inf"):
+            raise ValueError(f"{name} must be a positive number, got {value}")
+
+    cur = conn.execute(
+        "INSERT INTO jobs (input_path, output_folder, presets, target_duration, max_filesize_mb, priority, submitted_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (input_path, output_folder, json.dumps(presets), target_duration, max_filesize_mb, priority, time.time())
+    )
+    conn.commit()
+    return cur.lastrowid
+
+def claim_next_job(conn):
+    # BEGIN IMMEDIATE takes the write lock so two workers never claim the same row
+    conn.execute("BEGIN IMMEDIATE")
+    row = conn.execute(
+        "SELECT * FROM jobs WHERE status = 'queued' ORDER BY priority DESC, id LIMIT 1"
+    ).fetchone()
+    if row is None:
+        conn.rollback()
+        return None
+    conn.execute("UPDATE jobs SET status = 'running', started_at = ? WHERE id = ?", (time.time(), row["id"]))
+    conn.commit()
+    return job_to_dict(row)
+
+def worker_loop(job_available, stop_event):
+    conn = open_db()
+    while not stop_event.is_set():
+        job = claim_next_job(conn)
+        if job is None:
+            with job_available:
+                job_available.wait(timeout=5)
+            continue
+
+        def report(progress, job_id=job["id"]):
+            conn.execute("UPDATE jobs SET progress = ? WHERE id = ?", (progress, job_id))
+            conn.commit()
+
+        try:
+            os.makedirs(job["output_folder"], exist_ok=True)
+            process_video(job["input_path"], job["output_folder"], job["target_duration"],
+                          job["max_filesize_mb"], job["presets"], report)
+            conn.execute("UPDATE jobs SET status = 'done', progress = 1, finished_at = ? WHERE id = ?",
+                         (time.time(), job["id"]))
+        except Exception as e:
+            print(f"Job {job['id']} failed: {e}")
+            conn.execute("UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                         (str(e), time.time(), job["id"]))
+        conn.commit()
+    conn.close()
+
+class JobHandler(BaseHTTPRequestHandler):
+    job_available = None
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if self.path != "/jobs":
+            self.send_json(404, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            params = json.loads(self.rfile.read(length) or b"{}")
+            conn = open_db()
+            try:
+                job_id = submit_job(conn, params)
+            finally:
+                conn.close()
+        except (KeyError, ValueError, TypeError) as e:
+            self.send_json(400, {"error": str(e)})
+            return
+        with self.job_available:
+            self.job_available.notify()
+        self.send_json(201, {"id": job_id})
+
+    def do_GET(self):
+        conn = open_db()
+        try:
+            if self.path == "/jobs":
+                rows = conn.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT 200").fetchall()
+                self.send_json(200, [job_to_dict(r) for r in rows])
+            elif self.path.startswith("/jobs/") and self.path[6:].isdigit():
+                row = conn.execute("SELECT * FROM jobs WHERE id = ?", (int(self.path[6:]),)).fetchone()
+                if row is None:
+                    self.send_json(404, {"error": "no such job"})
+                else:
+                    self.send_json(200, job_to_dict(row))
+            else:
+                self.send_json(404, {"error": "not found"})
+        finally:
+            conn.close()
+
+    def log_message(self, format, *args):
+        pass  # Keep the console for job output
+
+def run_server():
+    init_db()
+    job_available = threading.Condition()
+    stop_event = threading.Event()
+    JobHandler.job_available = job_available
+
+    workers = [threading.Thread(target=worker_loop, args=(job_available, stop_event), daemon=True)
+               for _ in range(NUM_WORKERS)]
+    for worker in workers:
+        worker.start()
+
+    server = ThreadingHTTPServer((HOST, PORT), JobHandler)
+    print(f"Job server listening on http://{HOST}:{PORT} with {NUM_WORKERS} workers")
+    print(f"Submit with: curl -X POST http://{HOST}:{PORT}/jobs -d '{{\"source\": \"/path/video.mp4\", \"priority\": \"rush\"}}'")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Shutting down...")
+    finally:
+        stop_event.set()
+        with job_available:
+            job_available.notify_all()
+        server.server_close()
+
+if __name__ == "__main__":
+    run_server()
@@ -0,0 +1,255 @@
+import cv2
+import tkinter as tk
+from tkinter import filedialog, messagebox
+import os
+import json
+import subprocess
+import time
+import numpy as np
+from tqdm import tqdm
+
+# Preview proxies: a quarter of the resolution and half of the sampled frames
+PREVIEW_SCALE = 0.25
+PREVIEW_FRAME_STEP = 2
+# When preview samples are at least this far apart, decode keyframes only and take the nearest one
+KEYFRAME_SAMPLING_SECONDS = 1.0
+
+def select_file():
+    root = tk.Tk()
+    root.withdraw()
+    file_path = filedialog.askopenfilename(title="Select a video file", filetypes=[("Video files", "*.mp4;*.avi;*.mov")])
+    return file_path
+
+def crop_center_square_rect(width, height):
+    min_dim = min(width, height)
+    start_x = (width - min_dim) // 2
+    start_y = (height - min_dim) // 2
+    return (start_x, start_y, min_dim, min_dim)
+
+def crop_center_vertical_rect(width, height):
+    new_width = height * 9 // 16  # Maintain aspect ratio for 1080x1920
+    start_x = (width - new_width) // 2
+    return (start_x, 0, new_width, height)
+
+def calculate_bitrate(target_filesize_mb, duration_seconds):
+    target_filesize_bytes = target_filesize_mb * 1024 * 1024
+    target_bitrate_bps = (target_filesize_bytes * 8) / duration_seconds
+    return int(target_bitrate_bps)
+
+def plan_inputs(input_path, target_duration, max_filesize_mb):
+    # Everything the plan depends on; a saved plan is only reused when all of it matches
+    stat = os.stat(input_path)
+    return {
+        "input_path": input_path,
+        "source_size": stat.st_size,
+        "source_mtime": stat.st_mtime,
+        "target_duration": target_duration,
+        "max_filesize_mb": max_filesize_mb,
+    }
+
+def build_plan(input_path, target_duration=60, max_filesize_mb=64):
+    cap = cv2.VideoCapture(input_path)
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    original_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    original_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    cap.release()
+
+    original_duration = frame_count / fps
+    frames_to_skip = max(1, int(original_duration / target_duration))
+
+    # Crops are expressed on the 1920x1080 working frame, like the original script
+    return {
+        "inputs": plan_inputs(input_path, target_duration, max_filesize_mb),
+        "input_path": input_path,
+        "frame_count": frame_count,
+        "fps": fps,
+        "original_resolution": [original_width, original_height],
+        "frames_to_skip": frames_to_skip,
+        "target_duration": target_duration,
+        "target_bitrate": calculate_bitrate(max_filesize_mb, target_duration),
+        "working_resolution": [1920, 1080],
+        "outputs": {
+            "instagram": {"crop": crop_center_square_rect(1920, 1080), "size": [1080, 1080]},
+            "tiktok": {"crop": crop_center_vertical_rect(1920, 1080), "size": [1080, 1920]},
+            "youtube": {"crop": None, "size": [original_width, original_height]},
+        },
+    }
+
+def save_plan(plan, plan_path):
+    with open(plan_path, "w") as f:
+        json.dump(plan, f, indent=2)
+
+def load_plan(plan_path):
+    with open(plan_path) as f:
+        return json.load(f)
+
+def even(value):
+    return max(2, int(value) // 2 * 2)
+
+def open_encoder(output_path, size, fps, codec_args):
+    # Raw BGR frames go straight into ffmpeg, so there is no second re-encode pass
+    return subprocess.Popen(
+        [
+            "ffmpeg", "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "bgr24",
+            "-s", f"{size[0]}x{size[1]}", "-r", str(fps),
+            "-i", "pipe:0",
+            "-c:v", "libx264", "-pix_fmt", "yuv420p",
+        ] + codec_args + [output_path],
+        stdin=subprocess.PIPE
+    )
+
+def preview_frames(plan, size, sample_every):
+    # Proxy decode in ffmpeg: only the sampled frames, already downscaled, cross the pipe.
+    # For sparse samples only keyframes are decoded, so most of the source is never decoded at all.
+    fps = plan["fps"]
+    scale = f"scale={size[0]}:{size[1]}:flags=neighbor"
+    if sample_every / fps >= KEYFRAME_SAMPLING_SECONDS:
+        input_args = ["-skip_frame", "nokey"]
+        video_filter = f"fps={fps / sample_every},{scale}"
+        sync_args = []
+    else:
+        input_args = []
+        video_filter = f"select='not(mod(n\\,{sample_every}))',{scale}"
+        sync_args = ["-fps_mode", "passthrough"]
+    process = subprocess.Popen(
+        ["ffmpeg", "-loglevel", "error"] + input_args + ["-i", plan["input_path"], "-vf", video_filter]
+        + sync_args + ["-f", "rawvideo", "-pix_fmt", "bgr24", "pipe:1"],
+        stdout=subprocess.PIPE
+    )
+    frame_size = size[0] * size[1] * 3
+    try:
+        while True:
+            data = process.stdout.read(frame_size)
+            if len(data) < frame_size:
+                break
+            yield np.frombuffer(data, dtype=np.uint8).reshape(size[1], size[0], 3)
+    finally:
+        process.stdout.close()
+        if process.poll() is None:
+            process.terminate()
+        process.wait()
+
+def full_frames(plan):
+    cap = cv2.VideoCapture(plan["input_path"])
+    frames_to_skip = plan["frames_to_skip"]
+    current_frame = 0
+    try:
+        while True:
+            # grab() skips the colour conversion for frames we are going to drop
+            if current_frame % frames_to_skip != 0:
+                if not cap.grab():
+                    break
+                current_frame += 1
+                continue
+            ret, frame = cap.read()
+            if not ret:
+                break
+            current_frame += 1
+            yield frame
+    finally:
+        cap.release()
+
+def render(plan, output_base, preview=False):
+    fps = plan["fps"]
+    frames_to_skip = plan["frames_to_skip"]
+    working_resolution = tuple(plan["working_resolution"])
+    target_bitrate = str(plan["target_bitrate"])
+
+    if preview:
+        scale = PREVIEW_SCALE
+        frame_step = PREVIEW_FRAME_STEP
+        interpolation = cv2.INTER_NEAREST  # Cheap interpolation is enough to judge speed and framing
+        suffix = "preview"
+    else:
+        scale = 1.0
+        frame_step = 1
+        interpolation = cv2.INTER_LINEAR
+        suffix = "timelapse"
+
+    # Same timeline length as the full render, with fewer frames per second
+    output_fps = fps / frame_step
+    working_size = (even(working_resolution[0] * scale), even(working_resolution[1] * scale))
+
+    encoders = {}
+    for name, output in plan["outputs"].items():
+        size = (even(output["size"][0] * scale), even(output["size"][1] * scale))
+        if preview:
+            codec_args = ["-preset", "ultrafast", "-crf", "32"]
+        elif name == "youtube":
+            codec_args = ["-preset", "slow", "-crf", "18"]  # CRF 18 ensures high quality
+        else:
+            codec_args = ["-b:v", target_bitrate, "-maxrate", target_bitrate, "-bufsize", target_bitrate]
+        output_path = f"{output_base}_{name}_{suffix}.mp4"
+        encoders[name] = (open_encoder(output_path, size, output_fps, codec_args), size, output["crop"], output_path)
+
+    sample_every = frames_to_skip * frame_step
+    total_frames = plan["frame_count"] // sample_every
+    if preview:
+        frames = preview_frames(plan, encoders["youtube"][1], sample_every)
+    else:
+        frames = full_frames(plan)
+    start_time = time.time()
+
+    with tqdm(total=total_frames, desc=suffix) as pbar:
+        for frame in frames:
+            working_frame = cv2.resize(frame, working_size, interpolation=interpolation) \
+                if (frame.shape[1], frame.shape[0]) != working_size else frame
+
+            for name, (encoder, size, crop, _) in encoders.items():
+                if crop is None:
+                    # YouTube keeps the full frame; the preview reader already delivers it at proxy size
+                    out_frame = frame if size == (frame.shape[1], frame.shape[0]) else cv2.resize(frame, size, interpolation=interpolation)
+                else:
+                    x, y, w, h = (int(v * scale) for v in crop)
+                    out_frame = cv2.resize(working_frame[y:y+h, x:x+w], size, interpolation=interpolation)
+                encoder.stdin.write(out_frame.tobytes())
+
+            pbar.update(1)
+
+    for encoder, _, _, output_path in encoders.values():
+        encoder.stdin.close()
+        if encoder.wait() != 0:
+            print(f"Error during ffmpeg processing for {output_path}")
+
+    print(f"{suffix.capitalize()} render finished in {time.time() - start_time:.1f} seconds")
+    return [output_path for _, _, _, output_path in encoders.values()]
+
+def process_video(input_path, output_base, target_duration=60, max_filesize_mb=64):
+    plan_path = f"{output_base}_plan.json"
+
+    # Reuse the analysis from an earlier preview if it was made for the same settings
+    plan = None
+    if os.path.exists(plan_path):
+        plan = load_plan(plan_path)
+        if plan.get("inputs") != plan_inputs(input_path, target_duration, max_filesize_mb):
+            plan = None
+    if plan is None:
+        plan = build_plan(input_path, target_duration, max_filesize_mb)
+        save_plan(plan, plan_path)
+
+    print(f"Original Resolution: {tuple(plan['original_resolution'])}")
+    print(f"Target Duration: {target_duration} seconds")
+    print(f"Frame count: {plan['frame_count']}, FPS: {plan['fps']}, Frames to skip: {plan['frames_to_skip']}")
+
+    preview_files = render(plan, output_base, preview=True)
+    print("Preview files:")
+    for preview_file in preview_files:
+        print(f"  {preview_file}")
+
+    root = tk.Tk()
+    root.withdraw()
+    if messagebox.askyesno("Preview ready", "Check the preview files.\nRender the full-quality outputs with this plan?"):
+        render(plan, output_base, preview=False)
+        print(f"Timelapse videos saved as {output_base}_instagram_timelapse.mp4, {output_base}_tiktok_timelapse.mp4, and {output_base}_youtube_timelapse.mp4")
+    else:
+        print(f"Full render skipped; the plan is kept in {plan_path}")
+
+if __name__ == "__main__":
+    video_file = select_file()
+    if not video_file:
+        print("No file selected, exiting.")
+    else:
+        output_base = os.path.splitext(video_file)[0]
+        process_video(video_file, output_base)
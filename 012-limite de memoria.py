@@ -0,0 +1,324 @@
+import cv2
+import tkinter as tk
+from tkinter import filedialog
+import os
+import argparse
+import queue
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from tqdm import tqdm
+
+# Memory the interpreter, OpenCV and the codecs use before any frame is allocated
+BASE_OVERHEAD = 300 * 1024 * 1024
+# Start throttling when RSS reaches this share of the budget
+BACKPRESSURE_THRESHOLD = 0.9
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+def select_folder():
+    root = tk.Tk()
+    root.withdraw()
+    folder_path = filedialog.askdirectory(title="Select a folder containing video files")
+    return folder_path
+
+def parse_size(text):
+    units = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+    text = text.strip().upper().rstrip("B")
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+def format_size(num_bytes):
+    return f"{num_bytes / (1024 * 1024):.0f} MB"
+
+def rss_of(pid="self"):
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return 0
+
+class MemoryBudget:
+    def __init__(self, max_rss):
+        self.max_rss = max_rss
+        self.lock = threading.Lock()
+        self.children = set()
+        self.peaks = {}
+
+    def current_rss(self):
+        # Our own process plus the ffmpeg encoders we launched
+        with self.lock:
+            children = list(self.children)
+        return rss_of() + sum(rss_of(pid) for pid in children)
+
+    def record(self, stage, rss=None):
+        rss = self.current_rss() if rss is None else rss
+        with self.lock:
+            self.peaks[stage] = max(self.peaks.get(stage, 0), rss)
+        return rss
+
+    def wait_for_room(self, stage, drained):
+        # Backpressure: stall the caller instead of letting the OOM killer fire.
+        # Once there is nothing left to drain, waiting would never free memory.
+        stalled = 0.0
+        while self.record(stage) > self.max_rss * BACKPRESSURE_THRESHOLD and not drained():
+            time.sleep(0.05)
+            stalled += 0.05
+        return stalled
+
+    def plan(self, frame_size, concurrent_jobs):
+        width, height = frame_size
+        bgr_frame = width * height * 3
+        yuv_frame = width * height * 3 // 2
+        per_job = max(0, self.max_rss - BASE_OVERHEAD) // concurrent_jobs
+
+        # Half of each job's share for frames in flight, the rest for the encoders
+        queue_frames = max(2, min(32, per_job // 2 // bgr_frame))
+        lookahead = max(0, min(40, per_job // 2 // (3 * yuv_frame) - 4))
+        encoder_threads = max(1, min(os.cpu_count() or 1, lookahead // 4 + 1))
+        return queue_frames, lookahead, encoder_threads
+
+def jobs_that_fit(max_rss, largest_frame_size, requested_jobs):
+    # A job needs at least a small queue and a minimal encoder at its largest resolution
+    width, height = largest_frame_size
+    minimum_job = 2 * width * height * 3 + 6 * width * height * 3 // 2 + 64 * 1024 * 1024
+    fit = max(1, (max_rss - BASE_OVERHEAD) // minimum_job)
+    return max(1, min(requested_jobs, fit))
+
+def crop_center_square(frame):
+    height, width = frame.shape[:2]
+    min_dim = min(width, height)
+    start_x = (width - min_dim) // 2
+    start_y = (height - min_dim) // 2
+    return frame[start_y:start_y+min_dim, start_x:start_x+min_dim]
+
+def crop_center_vertical(frame):
+    height, width = frame.shape[:2]
+    new_width = height * 9 // 16  # Maintain aspect ratio for 1080x1920
+    start_x = (width - new_width) // 2
+    return frame[:, start_x:start_x+new_width]
+
+def calculate_bitrate(target_filesize_mb, duration_seconds):
+    target_filesize_bytes = target_filesize_mb * 1024 * 1024
+    target_bitrate_bps = (target_filesize_bytes * 8) / duration_seconds
+    return int(target_bitrate_bps)
+
+def run_ffmpeg(command, budget, stage):
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    with budget.lock:
+        budget.children.add(process.pid)
+    try:
+        while process.poll() is None:
+            budget.record(stage)
+            time.sleep(0.1)
+    finally:
+        with budget.lock:
+            budget.children.discard(process.pid)
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, command)
+
+def process_video(input_path, output_folder, budget, concurrent_jobs, target_duration=60, max_filesize_mb=64):
+    cap = cv2.VideoCapture(input_path)
+
+    # Get video properties
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    original_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    original_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    original_resolution = (original_width, original_height)
+    original_duration = frame_count / fps
+    frames_to_skip = max(1, int(original_duration / target_duration))
+
+    # Calculate target bitrate
+    target_bitrate = calculate_bitrate(max_filesize_mb, target_duration)
+
+    # Size the frame queue and the encoder lookahead from this job's share of the budget
+    queue_frames, lookahead, encoder_threads = budget.plan(original_resolution, concurrent_jobs)
+
+    # Define output filenames
+    base_name = os.path.splitext(os.path.basename(input_path))[0]
+    instagram_output = os.path.join(output_folder, f"{base_name}_instagram_timelapse.mp4")
+    tiktok_output = os.path.join(output_folder, f"{base_name}_tiktok_timelapse.mp4")
+    youtube_output = os.path.join(output_folder, f"{base_name}_youtube_timelapse.mp4")
+
+    # Create VideoWriter objects for Instagram, TikTok, and YouTube videos
+    fourcc = cv2.VideoWriter_fourcc(*'avc1')  # H.264 codec, ensures web compatibility
+    out_instagram = cv2.VideoWriter(instagram_output, fourcc, fps, (1080, 1080))
+    out_tiktok = cv2.VideoWriter(tiktok_output, fourcc, fps, (1080, 1920))
+    out_youtube = cv2.VideoWriter(youtube_output, fourcc, fps, original_resolution)
+
+    print(f"Processing {input_path}...")
+    print(f"Original Resolution: {original_resolution}")
+    print(f"Target Bitrate: {target_bitrate / 1e6:.2f} Mbps")
+    print(f"Frame count: {frame_count}, FPS: {fps}, Frames to skip: {frames_to_skip}")
+    print(f"Frame queue: {queue_frames} frames, encoder lookahead: {lookahead}, encoder threads: {encoder_threads}")
+
+    # Bounded queue between decoding and writing; put() blocks when the writer falls behind
+    frames = queue.Queue(maxsize=queue_frames)
+
+    writer_errors = []
+
+    def writer():
+        try:
+            while True:
+                frame = frames.get()
+                if frame is None:
+                    break
+                scaled_frame = cv2.resize(frame, (1920, 1080)) if original_resolution != (1920, 1080) else frame
+                out_instagram.write(cv2.resize(crop_center_square(scaled_frame), (1080, 1080)))
+                out_tiktok.write(cv2.resize(crop_center_vertical(scaled_frame), (1080, 1920)))
+                out_youtube.write(frame)
+                budget.record("write")
+        except Exception as e:
+            writer_errors.append(e)  # Re-raised by the decoding thread
+
+    writer_thread = threading.Thread(target=writer)
+    writer_thread.start()
+
+    def put_frame(frame):
+        # Never block forever on a full queue: the writer may have died
+        while writer_thread.is_alive():
+            try:
+                frames.put(frame, timeout=0.5)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    current_frame = 0
+    stalled = 0.0
+    total_frames = frame_count // frames_to_skip
+
+    try:
+        with tqdm(total=total_frames, desc=base_name) as pbar:
+            while True:
+                stalled += budget.wait_for_room("decode", lambda: frames.empty() or not writer_thread.is_alive())
+                if current_frame % frames_to_skip != 0:
+                    # grab() skips the conversion for frames we are going to drop
+                    if not cap.grab():
+                        break
+                    current_frame += 1
+                    continue
+
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                if not put_frame(frame):
+                    break
+                pbar.update(1)
+                current_frame += 1
+    finally:
+        put_frame(None)
+        writer_thread.join()
+        cap.release()
+        out_instagram.release()
+        out_tiktok.release()
+        out_youtube.release()
+
+    if writer_errors:
+        raise writer_errors[0]
+
+    if stalled:
+        print(f"Backpressure stalled decoding for {stalled:.1f} seconds")
+
+    # Lookahead and thread count are capped so the encoders also fit in the budget
+    encoder_args = ["-rc-lookahead", str(lookahead), "-threads", str(encoder_threads)]
+
+    # Re-encode Instagram and TikTok videos with the target bitrate using ffmpeg
+    for output_file in [instagram_output, tiktok_output]:
+        output_temp_file = output_file.replace('.mp4', '_temp.mp4')
+        os.rename(output_file, output_temp_file)
+
+        try:
+            budget.wait_for_room("ffmpeg", lambda: not budget.children)
+            run_ffmpeg(
+                [
+                    "ffmpeg", "-y", "-i", output_temp_file,
+                    "-c:v", "libx264",
+                    "-b:v", str(target_bitrate),
+                    "-maxrate", str(target_bitrate),
+                    "-bufsize", str(target_bitrate),
+                ] + encoder_args + [output_file],
+                budget, "ffmpeg"
+            )
+        except subprocess.CalledProcessError as e:
+            print(f"Error during ffmpeg processing: {e}")
+            os.rename(output_temp_file, output_file)  # Restore the original file if ffmpeg fails
+        finally:
+            if os.path.exists(output_temp_file):
+                os.remove(output_temp_file)  # Clean up the temp file
+
+    # Re-encode YouTube video with high quality to preserve original resolution
+    output_temp_file = youtube_output.replace('.mp4', '_temp.mp4')
+    os.rename(youtube_output, output_temp_file)
+    try:
+        budget.wait_for_room("ffmpeg", lambda: not budget.children)
+        run_ffmpeg(
+            [
+                "ffmpeg", "-y", "-i", output_temp_file,
+                "-c:v", "libx264", "-crf", "18",  # CRF 18 ensures high quality
+                "-preset", "slow",
+            ] + encoder_args + [youtube_output],
+            budget, "ffmpeg"
+        )
+    except subprocess.CalledProcessError as e:
+        print(f"Error during ffmpeg processing for YouTube: {e}")
+        os.rename(output_temp_file, youtube_output)
+    finally:
+        if os.path.exists(output_temp_file):
+            os.remove(output_temp_file)
+
+def largest_resolution(video_files):
+    largest = (1920, 1080)
+    for file_path in video_files:
+        cap = cv2.VideoCapture(file_path)
+        size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        cap.release()
+        if size[0] * size[1] > largest[0] * largest[1]:
+            largest = size
+    return largest
+
+def process_folder(folder_path, max_rss, requested_jobs):
+    output_folder = os.path.join(folder_path, "redes")
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+
+    video_files = [os.path.join(folder_path, f) for f in sorted(os.listdir(folder_path))
+                   if f.endswith((".mp4", ".avi", ".mov"))]
+
+    budget = MemoryBudget(max_rss)
+    concurrent_jobs = jobs_that_fit(max_rss, largest_resolution(video_files), requested_jobs)
+    print(f"Memory budget: {format_size(max_rss)}, concurrent jobs: {concurrent_jobs}")
+
+    with ThreadPoolExecutor(max_workers=concurrent_jobs) as pool:
+        futures = [pool.submit(process_video, f, output_folder, budget, concurrent_jobs) for f in video_files]
+        # One failed video must not hide the others' errors or the peak report
+        failures = []
+        for file_path, future in zip(video_files, futures):
+            try:
+                future.result()
+            except Exception as e:
+                failures.append((file_path, e))
+
+    print("Peak RSS per stage:")
+    for stage, peak in budget.peaks.items():
+        print(f"  {stage}: {format_size(peak)}")
+    if failures:
+        print(f"{len(failures)} of {len(video_files)} videos failed:")
+        for file_path, e in failures:
+            print(f"  {os.path.basename(file_path)}: {type(e).__name__}: {e}")
+    print(f"{len(video_files) - len(failures)} videos processed and saved in {output_folder}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Process a folder of videos within a memory budget")
+    parser.add_argument("folder", nargs="?", help="Folder with the videos (asks with a dialog if omitted)")
+    parser.add_argument("--max-rss", default="2G", help="Memory budget, e.g. 2G or 1500M")
+    parser.add_argument("--jobs", type=int, default=2, help="Maximum number of videos processed at once")
+    args = parser.parse_args()
+
+    folder_path = args.folder or select_folder()
+    if not folder_path:
+        print("No folder selected, exiting.")
+    else:
+        process_folder(folder_path, parse_size(args.max_rss), args.jobs)
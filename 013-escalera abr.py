@@ -0,0 +1,184 @@
+import cv2
+import tkinter as tk
+from tkinter import filedialog
+import os
+import subprocess
+from tqdm import tqdm
+
+# ABR ladder: (width, height, bitrate). Each rung is downscaled from the one above it.
+ABR_LADDER = [
+    (1920, 1080, "5000k"),
+    (1280, 720, "2800k"),
+    (854, 480, "1400k"),
+    (640, 360, "800k"),
+]
+SEGMENT_SECONDS = 4
+KEYFRAME_SECONDS = 2  # Segments always start on a keyframe shared by every rung
+
+def select_file():
+    root = tk.Tk()
+    root.withdraw()
+    file_path = filedialog.askopenfilename(title="Select a video file", filetypes=[("Video files", "*.mp4;*.avi;*.mov")])
+    return file_path
+
+def crop_center_square(frame):
+    height, width = frame.shape[:2]
+    min_dim = min(width, height)
+    start_x = (width - min_dim) // 2
+    start_y = (height - min_dim) // 2
+    return frame[start_y:start_y+min_dim, start_x:start_x+min_dim]
+
+def crop_center_vertical(frame):
+    height, width = frame.shape[:2]
+    new_width = height * 9 // 16  # Maintain aspect ratio for 1080x1920
+    start_x = (width - new_width) // 2
+    return frame[:, start_x:start_x+new_width]
+
+def calculate_bitrate(target_filesize_mb, duration_seconds):
+    target_filesize_bytes = target_filesize_mb * 1024 * 1024
+    target_bitrate_bps = (target_filesize_bytes * 8) / duration_seconds
+    return int(target_bitrate_bps)
+
+def open_encoder(output_path, size, fps, codec_args):
+    # Raw BGR frames go straight into ffmpeg; every encoder runs as its own process, in parallel
+    return subprocess.Popen(
+        [
+            "ffmpeg", "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "bgr24",
+            "-s", f"{size[0]}x{size[1]}", "-r", str(fps),
+            "-i", "pipe:0",
+            "-c:v", "libx264", "-pix_fmt", "yuv420p",
+        ] + codec_args + [output_path],
+        stdin=subprocess.PIPE
+    )
+
+def aligned_keyframe_args(fps, bitrate):
+    # Fixed GOP, no scene-cut keyframes: rungs switch cleanly at every segment boundary
+    gop = max(1, round(fps * KEYFRAME_SECONDS))
+    return [
+        "-b:v", bitrate, "-maxrate", bitrate, "-bufsize", bitrate,
+        "-g", str(gop), "-keyint_min", str(gop), "-sc_threshold", "0",
+        "-force_key_frames", f"expr:gte(t,n_forced*{KEYFRAME_SECONDS})",
+    ]
+
+def package_abr(rung_files, abr_folder):
+    # Stream copy only: DASH segments plus HLS playlists over the same fMP4 segments
+    command = ["ffmpeg", "-y", "-loglevel", "error"]
+    for rung_file in rung_files:
+        command += ["-i", rung_file]
+    for index in range(len(rung_files)):
+        command += ["-map", f"{index}:v"]
+    command += [
+        "-c", "copy",
+        "-f", "dash",
+        "-seg_duration", str(SEGMENT_SECONDS),
+        "-use_template", "1", "-use_timeline", "1",
+        "-hls_playlist", "1",
+        "-adaptation_sets", "id=0,streams=v",
+        os.path.join(abr_folder, "manifest.mpd"),
+    ]
+    subprocess.run(command, check=True)
+
+def process_video(input_path, output_base, target_duration=60, max_filesize_mb=64):
+    cap = cv2.VideoCapture(input_path)
+
+    # Get video properties
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    original_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    original_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    original_resolution = (original_width, original_height)
+    original_duration = frame_count / fps
+    frames_to_skip = max(1, int(original_duration / target_duration))
+
+    # Calculate target bitrate
+    target_bitrate = str(calculate_bitrate(max_filesize_mb, target_duration))
+
+    # Define output filenames
+    instagram_output = f"{output_base}_instagram_timelapse.mp4"
+    tiktok_output = f"{output_base}_tiktok_timelapse.mp4"
+    youtube_output = f"{output_base}_youtube_timelapse.mp4"
+    abr_folder = f"{output_base}_abr"
+    if not os.path.exists(abr_folder):
+        os.makedirs(abr_folder)
+
+    social_args = ["-b:v", target_bitrate, "-maxrate", target_bitrate, "-bufsize", target_bitrate]
+    encoders = {
+        "instagram": open_encoder(instagram_output, (1080, 1080), fps, social_args),
+        "tiktok": open_encoder(tiktok_output, (1080, 1920), fps, social_args),
+        "youtube": open_encoder(youtube_output, original_resolution, fps, ["-crf", "18", "-preset", "slow"]),
+    }
+
+    # One encoder per rung, fed from the same decoded frame
+    rung_files = []
+    rung_encoders = []
+    for width, height, bitrate in ABR_LADDER:
+        rung_file = os.path.join(abr_folder, f"rung_{height}p.mp4")
+        rung_files.append(rung_file)
+        rung_encoders.append(open_encoder(rung_file, (width, height), fps, aligned_keyframe_args(fps, bitrate)))
+
+    current_frame = 0
+
+    print(f"Original Resolution: {original_resolution}")
+    print(f"Original Duration: {original_duration:.2f} seconds")
+    print(f"Target Duration: {target_duration} seconds")
+    print(f"Frame count: {frame_count}, FPS: {fps}, Frames to skip: {frames_to_skip}")
+    print(f"ABR ladder: {', '.join(f'{h}p@{b}' for _, h, b in ABR_LADDER)}")
+
+    with tqdm(total=frame_count // frames_to_skip) as pbar:
+        while True:
+            if current_frame % frames_to_skip != 0:
+                # grab() skips the conversion for frames we are going to drop
+                if not cap.grab():
+                    break
+                current_frame += 1
+                continue
+
+            ret, frame = cap.read()
+            if not ret:
+                break
+
+            # Scale to 1080p if needed for Instagram, TikTok and the top rung
+            scaled_frame = cv2.resize(frame, (1920, 1080)) if original_resolution != (1920, 1080) else frame
+
+            encoders["instagram"].stdin.write(cv2.resize(crop_center_square(scaled_frame), (1080, 1080)).tobytes())
+            encoders["tiktok"].stdin.write(cv2.resize(crop_center_vertical(scaled_frame), (1080, 1920)).tobytes())
+            encoders["youtube"].stdin.write(frame.tobytes())
+
+            # Downscale pyramid: each rung comes from the previous one, not from the source
+            rung_frame = scaled_frame
+            for (width, height, _), encoder in zip(ABR_LADDER, rung_encoders):
+                if (rung_frame.shape[1], rung_frame.shape[0]) != (width, height):
+                    rung_frame = cv2.resize(rung_frame, (width, height), interpolation=cv2.INTER_AREA)
+                encoder.stdin.write(rung_frame.tobytes())
+
+            pbar.update(1)
+            current_frame += 1
+
+    cap.release()
+    failed = False
+    for encoder in list(encoders.values()) + rung_encoders:
+        encoder.stdin.close()
+        if encoder.wait() != 0:
+            failed = True
+    if failed:
+        print("Error during ffmpeg processing; the ABR ladder was not packaged.")
+        return
+
+    try:
+        package_abr(rung_files, abr_folder)
+    except subprocess.CalledProcessError as e:
+        print(f"Error during ABR packaging: {e}")
+        return
+    for rung_file in rung_files:
+        os.remove(rung_file)
+
+if __name__ == "__main__":
+    video_file = select_file()
+    if not video_file:
+        print("No file selected, exiting.")
+    else:
+        output_base = os.path.splitext(video_file)[0]
+        process_video(video_file, output_base)
+        print(f"Timelapse videos saved as {output_base}_instagram_timelapse.mp4, {output_base}_tiktok_timelapse.mp4, and {output_base}_youtube_timelapse.mp4")
+        print(f"ABR ladder saved in {output_base}_abr (manifest.mpd for DASH, master.m3u8 for HLS)")
@@ -0,0 +1,304 @@
+import cv2
+import tkinter as tk
+from tkinter import filedialog
+import os
+import subprocess
+import hashlib
+import json
+import tempfile
+import time
+import numpy as np
+from tqdm import tqdm
+
+# Sampled frames are cached as raw planar YUV 4:2:0 in memory-mappable files,
+# evicted least recently used first
+CACHE_DIR = os.environ.get("TIMELAPSE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "timelapse_cache"))
+CACHE_MAX_BYTES = int(float(os.environ.get("TIMELAPSE_CACHE_GB", "50")) * 1024 ** 3)
+# Temp files untouched for this long belong to a run that was killed
+STALE_TEMP_SECONDS = 3600
+
+def select_folder():
+    root = tk.Tk()
+    root.withdraw()
+    folder_path = filedialog.askdirectory(title="Select a folder containing video files")
+    return folder_path
+
+def crop_center_square(frame):
+    height, width = frame.shape[:2]
+    min_dim = min(width, height)
+    start_x = (width - min_dim) // 2
+    start_y = (height - min_dim) // 2
+    return frame[start_y:start_y+min_dim, start_x:start_x+min_dim]
+
+def crop_center_vertical(frame):
+    height, width = frame.shape[:2]
+    new_width = height * 9 // 16  # Maintain aspect ratio for 1080x1920
+    start_x = (width - new_width) // 2
+    return frame[:, start_x:start_x+new_width]
+
+def calculate_bitrate(target_filesize_mb, duration_seconds):
+    target_filesize_bytes = target_filesize_mb * 1024 * 1024
+    target_bitrate_bps = (target_filesize_bytes * 8) / duration_seconds
+    return int(target_bitrate_bps)
+
+def source_fingerprint(input_path):
+    # Size, mtime and the first and last MB identify a source without hashing all of it
+    stat = os.stat(input_path)
+    digest = hashlib.sha1(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+    with open(input_path, "rb") as f:
+        digest.update(f.read(1024 * 1024))
+        f.seek(max(0, stat.st_size - 1024 * 1024))
+        digest.update(f.read(1024 * 1024))
+    return digest.hexdigest()
+
+def cache_key(input_path, frames_to_skip, resolution):
+    plan = f"{source_fingerprint(input_path)}:{frames_to_skip}:{resolution[0]}x{resolution[1]}"
+    return hashlib.sha1(plan.encode()).hexdigest()
+
+def cache_files():
+    # Every file in the cache grouped by key, including partial and orphaned ones
+    groups = {}
+    for file_name in os.listdir(CACHE_DIR):
+        key = file_name.split(".", 1)[0]
+        path = os.path.join(CACHE_DIR, file_name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        groups.setdefault(key, {})[file_name[len(key):]] = (path, stat.st_size, stat.st_mtime)
+    return groups
+
+def remove_files(files):
+    for path, _, _ in files.values():
+        if os.path.exists(path):
+            os.remove(path)
+
+def evict_cache(bytes_needed):
+    now = time.time()
+    entries = []
+    total = 0
+    for key, files in cache_files().items():
+        # Leftovers of killed runs: stale temp files, and frames whose meta was never written
+        stale = {suffix: f for suffix, f in files.items() if suffix.endswith(".tmp") and now - f[2] > STALE_TEMP_SECONDS}
+        remove_files(stale)
+        files = {suffix: f for suffix, f in files.items() if suffix not in stale}
+        if ".frames" in files and ".json" not in files:
+            remove_files(files)
+            continue
+        if ".json" in files and ".frames" not in files and not any(suffix.endswith(".frames.tmp") for suffix in files):
+            remove_files(files)
+            continue
+        size = sum(f[1] for f in files.values())
+        total += size
+        if ".json" in files and ".frames" in files:
+            entries.append((files[".json"][2], files, size))
+
+    # Drop the least recently used entries until the new one fits
+    for _, files, size in sorted(entries, key=lambda entry: entry[0]):
+        if total + bytes_needed <= CACHE_MAX_BYTES:
+            break
+        remove_files(files)
+        total -= size
+
+def open_cached_frames(key):
+    meta_path = os.path.join(CACHE_DIR, f"{key}.json")
+    frames_path = os.path.join(CACHE_DIR, f"{key}.frames")
+    if not (os.path.exists(meta_path) and os.path.exists(frames_path)):
+        return None
+    with open(meta_path) as f:
+        meta = json.load(f)
+    os.utime(meta_path)  # Mark as recently used
+    width, height = meta["width"], meta["height"]
+    # Planar I420: the Y plane followed by the quarter-size U and V planes, 1.5 bytes per pixel
+    shape = (meta["count"], height * 3 // 2, width)
+    return meta["count"], np.memmap(frames_path, dtype=np.uint8, mode="r", shape=shape)
+
+def cached_frames(frames):
+    for yuv in frames:
+        yield cv2.cvtColor(yuv, cv2.COLOR_YUV2BGR_I420)
+
+def decode_and_cache(cap, key, frames_to_skip, resolution, expected_frames):
+    # Yields the sampled frames while appending them to the cache file
+    width, height = resolution
+    meta_path = os.path.join(CACHE_DIR, f"{key}.json")
+    frames_path = os.path.join(CACHE_DIR, f"{key}.frames")
+
+    frame_bytes = width * height * 3 // 2
+    if width % 2 or height % 2 or expected_frames * frame_bytes > CACHE_MAX_BYTES:
+        cache_file = None  # Odd sizes have no I420 layout, or bigger than the whole cache; just decode
+    else:
+        evict_cache(expected_frames * frame_bytes)
+        # Unique temp name: two renders of the same source may be filling the cache at once
+        fd, temp_path = tempfile.mkstemp(dir=CACHE_DIR, prefix=key + ".", suffix=".frames.tmp")
+        cache_file = os.fdopen(fd, "wb")
+
+    current_frame = 0
+    count = 0
+    finished = False
+    try:
+        while True:
+            if current_frame % frames_to_skip != 0:
+                # grab() skips the conversion for frames we are going to drop
+                if not cap.grab():
+                    break
+                current_frame += 1
+                continue
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if cache_file is not None:
+                cache_file.write(cv2.cvtColor(frame, cv2.COLOR_BGR2YUV_I420).tobytes())
+            count += 1
+            current_frame += 1
+            yield frame
+        finished = True
+    finally:
+        if cache_file is not None:
+            cache_file.close()
+            if finished and count > 0:
+                # Meta first, then the frames: a published .frames file always has its meta
+                fd, meta_temp_path = tempfile.mkstemp(dir=CACHE_DIR, prefix=key + ".", suffix=".json.tmp")
+                with os.fdopen(fd, "w") as f:
+                    json.dump({"count": count, "width": width, "height": height}, f)
+                os.replace(meta_temp_path, meta_path)
+                os.replace(temp_path, frames_path)
+            elif os.path.exists(temp_path):
+                os.remove(temp_path)
+
+def process_video(input_path, output_folder, target_duration=60, max_filesize_mb=64):
+    cap = cv2.VideoCapture(input_path)
+    
+    # Get video properties
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    original_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    original_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    original_resolution = (original_width, original_height)
+    original_duration = frame_count / fps
+    frames_to_skip = max(1, int(original_duration / target_duration))
+
+    # Calculate target bitrate
+    target_bitrate = calculate_bitrate(max_filesize_mb, target_duration)
+
+    # Define output filenames
+    base_name = os.path.splitext(os.path.basename(input_path))[0]
+    instagram_output = os.path.join(output_folder, f"{base_name}_instagram_timelapse.mp4")
+    tiktok_output = os.path.join(output_folder, f"{base_name}_tiktok_timelapse.mp4")
+    youtube_output = os.path.join(output_folder, f"{base_name}_youtube_timelapse.mp4")
+
+    # Create VideoWriter objects for Instagram, TikTok, and YouTube videos
+    fourcc = cv2.VideoWriter_fourcc(*'avc1')  # H.264 codec, ensures web compatibility
+    out_instagram = cv2.VideoWriter(instagram_output, fourcc, fps, (1080, 1080))
+    out_tiktok = cv2.VideoWriter(tiktok_output, fourcc, fps, (1080, 1920))
+    out_youtube = cv2.VideoWriter(youtube_output, fourcc, fps, original_resolution)
+
+    processed_frames = 0
+
+    print(f"Processing {input_path}...")
+    print(f"Original Resolution: {original_resolution}")
+    print(f"Original Duration: {original_duration:.2f} seconds")
+    print(f"Target Duration: {target_duration} seconds")
+    print(f"Target Bitrate: {target_bitrate / 1e6:.2f} Mbps")
+    print(f"Frame count: {frame_count}, FPS: {fps}, Frames to skip: {frames_to_skip}")
+
+    # Stream from the cache when the same sample of the same source was decoded before
+    if not os.path.exists(CACHE_DIR):
+        os.makedirs(CACHE_DIR)
+    key = cache_key(input_path, frames_to_skip, original_resolution)
+    cached = open_cached_frames(key)
+    if cached is not None:
+        total_frames, frames = cached
+        print(f"Using {total_frames} cached frames, skipping decode")
+        sampled_frames = cached_frames(frames)
+    else:
+        total_frames = frame_count // frames_to_skip
+        sampled_frames = decode_and_cache(cap, key, frames_to_skip, original_resolution, total_frames + 1)
+
+    with tqdm(total=total_frames) as pbar:
+        for frame in sampled_frames:
+            # Scale to 1080p if needed for Instagram and TikTok
+            scaled_frame = cv2.resize(frame, (1920, 1080)) if original_resolution != (1920, 1080) else frame
+
+            # Process Instagram video (1080x1080)
+            cropped_square = crop_center_square(scaled_frame)
+            resized_square = cv2.resize(cropped_square, (1080, 1080))
+            out_instagram.write(resized_square)
+
+            # Process TikTok video (1080x1920)
+            cropped_vertical = crop_center_vertical(scaled_frame)
+            resized_vertical = cv2.resize(cropped_vertical, (1080, 1920))
+            out_tiktok.write(resized_vertical)
+
+            # Process YouTube video (original resolution)
+            out_youtube.write(frame)  # Use the original frame without resizing
+
+            processed_frames += 1
+            pbar.update(1)
+
+    cap.release()
+    out_instagram.release()
+    out_tiktok.release()
+    out_youtube.release()
+
+    # Re-encode Instagram and TikTok videos with the target bitrate using ffmpeg
+    for output_file in [instagram_output, tiktok_output]:
+        output_temp_file = output_file.replace('.mp4', '_temp.mp4')
+        os.rename(output_file, output_temp_file)
+        
+        try:
+            subprocess.run(
+                [
+                    "ffmpeg", "-i", output_temp_file, 
+                    "-b:v", str(target_bitrate), 
+                    "-maxrate", str(target_bitrate), 
+                    "-bufsize", str(target_bitrate), 
+                    output_file
+                ],
+                check=True
+            )
+        except subprocess.CalledProcessError as e:
+            print(f"Error during ffmpeg processing: {e}")
+            os.rename(output_temp_file, output_file)  # Restore the original file if ffmpeg fails
+        finally:
+            if os.path.exists(output_temp_file):
+                os.remove(output_temp_file)  # Clean up the temp file
+
+    # Re-encode YouTube video with high quality to preserve original resolution
+    output_temp_file = youtube_output.replace('.mp4', '_temp.mp4')
+    os.rename(youtube_output, output_temp_file)
+    try:
+        subprocess.run(
+            [
+                "ffmpeg", "-i", output_temp_file,
+                "-c:v", "libx264", "-crf", "18",  # CRF 18 ensures high quality
+                "-preset", "slow",
+                youtube_output
+            ],
+            check=True
+        )
+    except subprocess.CalledProcessError as e:
+        print(f"Error during ffmpeg processing for YouTube: {e}")
+        os.rename(output_temp_file, youtube_output)
+    finally:
+        if os.path.exists(output_temp_file):
+            os.remove(output_temp_file)
+
+def process_folder():
+    folder_path = select_folder()
+    if not folder_path:
+        print("No folder selected, exiting.")
+        return
+
+    output_folder = os.path.join(folder_path, "redes")
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+
+    for file_name in os.listdir(folder_path):
+        if file_name.endswith((".mp4", ".avi", ".mov")):
+            file_path = os.path.join(folder_path, file_name)
+            process_video(file_path, output_folder)
+    
+    print(f"All videos processed and saved in {output_folder}")
+
+if __name__ == "__main__":
+    process_folder()
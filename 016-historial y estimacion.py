@@ -0,0 +1,380 @@
+import cv2
+import tkinter as tk
+from tkinter import filedialog
+import os
+import argparse
+import json
+import resource
+import sqlite3
+import subprocess
+import time
+from tqdm import tqdm
+
+HISTORY_PATH = os.path.join(os.path.expanduser("~"), ".timelapse_history.sqlite3")
+
+def select_folder():
+    root = tk.Tk()
+    root.withdraw()
+    folder_path = filedialog.askdirectory(title="Select a folder containing video files")
+    return folder_path
+
+def crop_center_square(frame):
+    height, width = frame.shape[:2]
+    min_dim = min(width, height)
+    start_x = (width - min_dim) // 2
+    start_y = (height - min_dim) // 2
+    return frame[start_y:start_y+min_dim, start_x:start_x+min_dim]
+
+def crop_center_vertical(frame):
+    height, width = frame.shape[:2]
+    new_width = height * 9 // 16  # Maintain aspect ratio for 1080x1920
+    start_x = (width - new_width) // 2
+    return frame[:, start_x:start_x+new_width]
+
+def calculate_bitrate(target_filesize_mb, duration_seconds):
+    target_filesize_bytes = target_filesize_mb * 1024 * 1024
+    target_bitrate_bps = (target_filesize_bytes * 8) / duration_seconds
+    return int(target_bitrate_bps)
+
+def open_history():
+    conn = sqlite3.connect(HISTORY_PATH)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS stages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            input_path TEXT,
+            width INTEGER,
+            height INTEGER,
+            preset TEXT,
+            stage TEXT,
+            frames INTEGER,
+            seconds REAL,
+            cpu_seconds REAL,
+            output_bytes INTEGER,
+            output_seconds REAL,
+            recorded_at REAL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS predictions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            input_path TEXT,
+            predicted_seconds REAL,
+            actual_seconds REAL,
+            recorded_at REAL
+        )
+    """)
+    return conn
+
+def cpu_time():
+    # Our own CPU plus the finished ffmpeg children
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+def record_stage(conn, input_path, resolution, preset, stage, frames, seconds, cpu_seconds, output_bytes=None, output_seconds=None):
+    conn.execute(
+        "INSERT INTO stages (input_path, width, height, preset, stage, frames, seconds, cpu_seconds, output_bytes, output_seconds, recorded_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (input_path, resolution[0], resolution[1], preset, stage, frames, seconds, cpu_seconds, output_bytes, output_seconds, time.time())
+    )
+    conn.commit()
+
+def parse_rate(rate):
+    # ffprobe reports "0/0" when it does not know the rate
+    num, _, den = (rate or "0/0").partition("/")
+    try:
+        num, den = float(num), float(den or 1)
+    except ValueError:
+        return 0.0
+    return num / den if den else 0.0
+
+def probe(input_path):
+    # ffprobe only reads the container headers; nothing is decoded
+    result = subprocess.run(
+        [
+            "ffprobe", "-v", "error", "-select_streams", "v:0",
+            "-show_entries", "stream=width,height,nb_frames,r_frame_rate,avg_frame_rate:format=duration",
+            "-of", "json", input_path
+        ],
+        capture_output=True, check=True, text=True
+    )
+    info = json.loads(result.stdout)
+    stream = info["streams"][0]
+    fps = parse_rate(stream.get("r_frame_rate")) or parse_rate(stream.get("avg_frame_rate"))
+    if not fps:
+        raise ValueError(f"No frame rate in {input_path}")
+    duration = float(info["format"].get("duration", 0))
+    frame_count = int(stream.get("nb_frames") or duration * fps)
+    return (int(stream["width"]), int(stream["height"])), fps, frame_count
+
+def stage_rates(conn, resolution, preset, stage, scale_by_pixels=True):
+    # Closest resolution in the history wins; throughput is scaled by pixel count for the stages
+    # that work at the source resolution
+    rows = conn.execute(
+        "SELECT width, height, SUM(frames), SUM(seconds), SUM(cpu_seconds), SUM(output_bytes), SUM(output_seconds) "
+        "FROM stages WHERE preset = ? AND stage = ? AND seconds > 0 GROUP BY width, height",
+        (preset, stage)
+    ).fetchall()
+    if not rows:
+        return None
+    pixels = resolution[0] * resolution[1]
+    width, height, frames, seconds, cpu_seconds, output_bytes, output_seconds = \
+        min(rows, key=lambda r: abs(r[0] * r[1] - pixels))
+    scale = (width * height) / pixels if scale_by_pixels else 1.0
+    return {
+        "frames_per_second": frames / seconds * scale,
+        "cpu_per_second": cpu_seconds / seconds,
+        "bytes_per_output_second": output_bytes / output_seconds if output_bytes and output_seconds else None,
+    }
+
+def estimate_video(conn, input_path, target_duration=60, max_filesize_mb=64):
+    resolution, fps, frame_count = probe(input_path)
+    frames_to_skip = max(1, int(frame_count / fps / target_duration)) if fps else 1
+    sampled_frames = frame_count // frames_to_skip
+    output_seconds = sampled_frames / fps if fps else 0
+    bitrate_cap_bytes = calculate_bitrate(max_filesize_mb, target_duration) / 8 * output_seconds
+
+    estimate = {"wall_seconds": 0.0, "cpu_seconds": 0.0, "sizes": {}, "missing": []}
+
+    decode = stage_rates(conn, resolution, "all", "frame_loop")
+    if decode:
+        seconds = frame_count / decode["frames_per_second"]
+        estimate["wall_seconds"] += seconds
+        estimate["cpu_seconds"] += seconds * decode["cpu_per_second"]
+    else:
+        estimate["missing"].append("frame_loop")
+
+    for preset in ("instagram", "tiktok", "youtube"):
+        # Instagram and TikTok always encode 1080x1080 and 1080x1920, whatever the source size
+        rates = stage_rates(conn, resolution, preset, "ffmpeg", scale_by_pixels=preset == "youtube")
+        if rates is None:
+            estimate["missing"].append(f"ffmpeg/{preset}")
+            if preset != "youtube":
+                estimate["sizes"][preset] = bitrate_cap_bytes
+            continue
+        seconds = sampled_frames / rates["frames_per_second"]
+        estimate["wall_seconds"] += seconds
+        estimate["cpu_seconds"] += seconds * rates["cpu_per_second"]
+        if rates["bytes_per_output_second"]:
+            size = rates["bytes_per_output_second"] * output_seconds
+            # Instagram and TikTok are capped by the target bitrate
+            estimate["sizes"][preset] = size if preset == "youtube" else min(size, bitrate_cap_bytes)
+    return estimate
+
+def estimator_error(conn):
+    rows = conn.execute(
+        "SELECT predicted_seconds, actual_seconds FROM predictions WHERE predicted_seconds > 0 AND actual_seconds > 0"
+    ).fetchall()
+    if not rows:
+        return None, 0
+    errors = [abs(predicted - actual) / actual for predicted, actual in rows]
+    return sum(errors) / len(errors), len(rows)
+
+def run_ffmpeg_stage(conn, command, input_path, resolution, preset, frames, output_file, output_seconds):
+    start_time, start_cpu = time.time(), cpu_time()
+    subprocess.run(command, check=True)
+    record_stage(conn, input_path, resolution, preset, "ffmpeg", frames,
+                 time.time() - start_time, cpu_time() - start_cpu,
+                 os.path.getsize(output_file), output_seconds)
+
+def process_video(conn, input_path, output_folder, target_duration=60, max_filesize_mb=64):
+    run_start = time.time()
+    try:
+        predicted_seconds = estimate_video(conn, input_path, target_duration, max_filesize_mb)["wall_seconds"]
+    except (subprocess.CalledProcessError, KeyError, IndexError, ValueError, ZeroDivisionError):
+        predicted_seconds = 0
+
+    cap = cv2.VideoCapture(input_path)
+
+    # Get video properties
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    original_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    original_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    original_resolution = (original_width, original_height)
+    original_duration = frame_count / fps
+    frames_to_skip = max(1, int(original_duration / target_duration))
+
+    # Calculate target bitrate
+    target_bitrate = calculate_bitrate(max_filesize_mb, target_duration)
+
+    # Define output filenames
+    base_name = os.path.splitext(os.path.basename(input_path))[0]
+    instagram_output = os.path.join(output_folder, f"{base_name}_instagram_timelapse.mp4")
+    tiktok_output = os.path.join(output_folder, f"{base_name}_tiktok_timelapse.mp4")
+    youtube_output = os.path.join(output_folder, f"{base_name}_youtube_timelapse.mp4")
+
+    # Create VideoWriter objects for Instagram, TikTok, and YouTube videos
+    fourcc = cv2.VideoWriter_fourcc(*'avc1')  # H.264 codec, ensures web compatibility
+    out_instagram = cv2.VideoWriter(instagram_output, fourcc, fps, (1080, 1080))
+    out_tiktok = cv2.VideoWriter(tiktok_output, fourcc, fps, (1080, 1920))
+    out_youtube = cv2.VideoWriter(youtube_output, fourcc, fps, original_resolution)
+
+    current_frame = 0
+    processed_frames = 0
+
+    print(f"Processing {input_path}...")
+    print(f"Original Resolution: {original_resolution}")
+    print(f"Original Duration: {original_duration:.2f} seconds")
+    print(f"Target Duration: {target_duration} seconds")
+    print(f"Target Bitrate: {target_bitrate / 1e6:.2f} Mbps")
+    print(f"Frame count: {frame_count}, FPS: {fps}, Frames to skip: {frames_to_skip}")
+
+    total_frames = frame_count // frames_to_skip
+    stage_start, stage_cpu = time.time(), cpu_time()
+
+    with tqdm(total=total_frames) as pbar:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+
+            if current_frame % frames_to_skip == 0:
+                # Scale to 1080p if needed for Instagram and TikTok
+                scaled_frame = cv2.resize(frame, (1920, 1080)) if original_resolution != (1920, 1080) else frame
+
+                # Process Instagram video (1080x1080)
+                cropped_square = crop_center_square(scaled_frame)
+                resized_square = cv2.resize(cropped_square, (1080, 1080))
+                out_instagram.write(resized_square)
+
+                # Process TikTok video (1080x1920)
+                cropped_vertical = crop_center_vertical(scaled_frame)
+                resized_vertical = cv2.resize(cropped_vertical, (1080, 1920))
+                out_tiktok.write(resized_vertical)
+
+                # Process YouTube video (original resolution)
+                out_youtube.write(frame)  # Use the original frame without resizing
+
+                processed_frames += 1
+                pbar.update(1)
+
+            current_frame += 1
+
+    cap.release()
+    out_instagram.release()
+    out_tiktok.release()
+    out_youtube.release()
+
+    # Throughput of the decode/crop/write loop is measured in source frames
+    record_stage(conn, input_path, original_resolution, "all", "frame_loop", current_frame,
+                 time.time() - stage_start, cpu_time() - stage_cpu)
+    output_seconds = processed_frames / fps
+
+    # Re-encode Instagram and TikTok videos with the target bitrate using ffmpeg
+    for output_file, preset in [(instagram_output, "instagram"), (tiktok_output, "tiktok")]:
+        output_temp_file = output_file.replace('.mp4', '_temp.mp4')
+        os.rename(output_file, output_temp_file)
+
+        try:
+            run_ffmpeg_stage(
+                conn,
+                [
+                    "ffmpeg", "-y", "-i", output_temp_file,
+                    "-b:v", str(target_bitrate),
+                    "-maxrate", str(target_bitrate),
+                    "-bufsize", str(target_bitrate),
+                    output_file
+                ],
+                input_path, original_resolution, preset, processed_frames, output_file, output_seconds
+            )
+        except subprocess.CalledProcessError as e:
+            print(f"Error during ffmpeg processing: {e}")
+            os.rename(output_temp_file, output_file)  # Restore the original file if ffmpeg fails
+        finally:
+            if os.path.exists(output_temp_file):
+                os.remove(output_temp_file)  # Clean up the temp file
+
+    # Re-encode YouTube video with high quality to preserve original resolution
+    output_temp_file = youtube_output.replace('.mp4', '_temp.mp4')
+    os.rename(youtube_output, output_temp_file)
+    try:
+        run_ffmpeg_stage(
+            conn,
+            [
+                "ffmpeg", "-y", "-i", output_temp_file,
+                "-c:v", "libx264", "-crf", "18",  # CRF 18 ensures high quality
+                "-preset", "slow",
+                youtube_output
+            ],
+            input_path, original_resolution, "youtube", processed_frames, youtube_output, output_seconds
+        )
+    except subprocess.CalledProcessError as e:
+        print(f"Error during ffmpeg processing for YouTube: {e}")
+        os.rename(output_temp_file, youtube_output)
+    finally:
+        if os.path.exists(output_temp_file):
+            os.remove(output_temp_file)
+
+    # Keep the prediction next to the real time so the estimator error can be tracked
+    actual_seconds = time.time() - run_start
+    conn.execute(
+        "INSERT INTO predictions (input_path, predicted_seconds, actual_seconds, recorded_at) VALUES (?, ?, ?, ?)",
+        (input_path, predicted_seconds, actual_seconds, time.time())
+    )
+    conn.commit()
+    if predicted_seconds:
+        print(f"Took {actual_seconds:.0f} seconds (estimated {predicted_seconds:.0f} seconds)")
+
+def list_videos(path):
+    if os.path.isfile(path):
+        return [path]
+    return [os.path.join(path, f) for f in sorted(os.listdir(path)) if f.endswith((".mp4", ".avi", ".mov"))]
+
+def dry_run(conn, path):
+    total_wall = 0.0
+    total_cpu = 0.0
+    missing = set()
+    unprobeable = []
+    for file_path in list_videos(path):
+        try:
+            estimate = estimate_video(conn, file_path)
+        except (subprocess.CalledProcessError, KeyError, IndexError, ValueError, ZeroDivisionError) as e:
+            unprobeable.append((file_path, e))
+            continue
+        total_wall += estimate["wall_seconds"]
+        total_cpu += estimate["cpu_seconds"]
+        missing.update(estimate["missing"])
+        sizes = ", ".join(f"{preset} {size / 1024 / 1024:.1f} MB" for preset, size in estimate["sizes"].items())
+        print(f"{os.path.basename(file_path)}: {estimate['wall_seconds'] / 60:.1f} min, {sizes}")
+
+    print(f"Estimated wall time: {total_wall / 3600:.2f} h, CPU time: {total_cpu / 3600:.2f} CPU-hours")
+    if unprobeable:
+        print(f"Could not probe {len(unprobeable)} files; they are not included:")
+        for file_path, error in unprobeable:
+            print(f"  {os.path.basename(file_path)}: {error or type(error).__name__}")
+    if missing:
+        print(f"No history yet for: {', '.join(sorted(missing))}; those stages are not included")
+    error, runs = estimator_error(conn)
+    if error is None:
+        print("Estimator error: unknown until some runs are recorded")
+    else:
+        print(f"Estimator error: {error * 100:.0f}% mean absolute error over {runs} runs")
+
+def process_folder(folder_path):
+    output_folder = os.path.join(folder_path, "redes")
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+
+    conn = open_history()
+    for file_path in list_videos(folder_path):
+        process_video(conn, file_path, output_folder)
+    conn.close()
+
+    print(f"All videos processed and saved in {output_folder}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Process a folder of videos and keep a history of run times")
+    parser.add_argument("path", nargs="?", help="Folder (or a single file for --dry-run); asks with a dialog if omitted")
+    parser.add_argument("--dry-run", action="store_true", help="Only estimate time, CPU-hours and output sizes")
+    args = parser.parse_args()
+
+    path = args.path or select_folder()
+    if not path:
+        print("No folder selected, exiting.")
+    elif args.dry_run:
+        conn = open_history()
+        dry_run(conn, path)
+        conn.close()
+    else:
+        process_folder(path)
@@ -0,0 +1,379 @@
+import cv2
+import tkinter as tk
+from tkinter import filedialog
+import os
+import subprocess
+import argparse
+import json
+import multiprocessing
+import socket
+import threading
+import time
+import uuid
+from tqdm import tqdm
+
+# A lease whose heartbeat has not changed for this long is considered abandoned
+LEASE_TIMEOUT = 120
+HEARTBEAT_INTERVAL = 15
+
+def select_folder():
+    root = tk.Tk()
+    root.withdraw()
+    folder_path = filedialog.askdirectory(title="Select a folder containing video files")
+    return folder_path
+
+def crop_center_square(frame):
+    height, width = frame.shape[:2]
+    min_dim = min(width, height)
+    start_x = (width - min_dim) // 2
+    start_y = (height - min_dim) // 2
+    return frame[start_y:start_y+min_dim, start_x:start_x+min_dim]
+
+def crop_center_vertical(frame):
+    height, width = frame.shape[:2]
+    new_width = height * 9 // 16  # Maintain aspect ratio for 1080x1920
+    start_x = (width - new_width) // 2
+    return frame[:, start_x:start_x+new_width]
+
+def calculate_bitrate(target_filesize_mb, duration_seconds):
+    target_filesize_bytes = target_filesize_mb * 1024 * 1024
+    target_bitrate_bps = (target_filesize_bytes * 8) / duration_seconds
+    return int(target_bitrate_bps)
+
+class LeaseLost(Exception):
+    pass
+
+def check_lease(lost_event):
+    if lost_event is not None and lost_event.is_set():
+        raise LeaseLost("Another worker took over the lease")
+
+def process_video(input_path, output_folder, target_duration=60, max_filesize_mb=64, lost_event=None):
+    cap = cv2.VideoCapture(input_path)
+    
+    # Get video properties
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    original_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    original_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    original_resolution = (original_width, original_height)
+    original_duration = frame_count / fps
+    frames_to_skip = max(1, int(original_duration / target_duration))
+
+    # Calculate target bitrate
+    target_bitrate = calculate_bitrate(max_filesize_mb, target_duration)
+
+    # Define output filenames
+    base_name = os.path.splitext(os.path.basename(input_path))[0]
+    instagram_output = os.path.join(output_folder, f"{base_name}_instagram_timelapse.mp4")
+    tiktok_output = os.path.join(output_folder, f"{base_name}_tiktok_timelapse.mp4")
+    youtube_output = os.path.join(output_folder, f"{base_name}_youtube_timelapse.mp4")
+
+    # Create VideoWriter objects for Instagram, TikTok, and YouTube videos
+    fourcc = cv2.VideoWriter_fourcc(*'avc1')  # H.264 codec, ensures web compatibility
+    out_instagram = cv2.VideoWriter(instagram_output, fourcc, fps, (1080, 1080))
+    out_tiktok = cv2.VideoWriter(tiktok_output, fourcc, fps, (1080, 1920))
+    out_youtube = cv2.VideoWriter(youtube_output, fourcc, fps, original_resolution)
+
+    current_frame = 0
+    processed_frames = 0
+
+    print(f"Processing {input_path}...")
+    print(f"Original Resolution: {original_resolution}")
+    print(f"Original Duration: {original_duration:.2f} seconds")
+    print(f"Target Duration: {target_duration} seconds")
+    print(f"Target Bitrate: {target_bitrate / 1e6:.2f} Mbps")
+    print(f"Frame count: {frame_count}, FPS: {fps}, Frames to skip: {frames_to_skip}")
+
+    total_frames = frame_count // frames_to_skip
+    update_interval = total_frames // 20  # 5% intervals
+
+    with tqdm(total=total_frames) as pbar:
+        while True:
+            # Stop as soon as the lease is gone; the new owner renders this video from scratch
+            if lost_event is not None and lost_event.is_set():
+                break
+            ret, frame = cap.read()
+            if not ret:
+                break
+
+            if current_frame % frames_to_skip == 0:
+                # Scale to 1080p if needed for Instagram and TikTok
+                scaled_frame = cv2.resize(frame, (1920, 1080)) if original_resolution != (1920, 1080) else frame
+                
+                # Process Instagram video (1080x1080)
+                cropped_square = crop_center_square(scaled_frame)
+                resized_square = cv2.resize(cropped_square, (1080, 1080))
+                out_instagram.write(resized_square)
+
+                # Process TikTok video (1080x1920)
+                cropped_vertical = crop_center_vertical(scaled_frame)
+                resized_vertical = cv2.resize(cropped_vertical, (1080, 1920))
+                out_tiktok.write(resized_vertical)
+
+                # Process YouTube video (original resolution)
+                out_youtube.write(frame)  # Use the original frame without resizing
+
+                processed_frames += 1
+
+                # Update progress bar every 5% of total progress
+                if processed_frames % update_interval == 0:
+                    pbar.update(update_interval)
+            
+            current_frame += 1
+
+        # Final update to ensure the progress bar completes
+        if processed_frames % update_interval != 0:
+            pbar.update(total_frames - pbar.n)
+
+    cap.release()
+    out_instagram.release()
+    out_tiktok.release()
+    out_youtube.release()
+    source_frames = current_frame
+    check_lease(lost_event)
+
+    # Re-encode Instagram and TikTok videos with the target bitrate using ffmpeg
+    for output_file in [instagram_output, tiktok_output]:
+        check_lease(lost_event)
+        output_temp_file = output_file.replace('.mp4', '_temp.mp4')
+        os.rename(output_file, output_temp_file)
+        
+        try:
+            subprocess.run(
+                [
+                    "ffmpeg", "-i", output_temp_file, 
+                    "-b:v", str(target_bitrate), 
+                    "-maxrate", str(target_bitrate), 
+                    "-bufsize", str(target_bitrate), 
+                    output_file
+                ],
+                check=True
+            )
+        except subprocess.CalledProcessError as e:
+            print(f"Error during ffmpeg processing: {e}")
+            os.rename(output_temp_file, output_file)  # Restore the original file if ffmpeg fails
+        finally:
+            if os.path.exists(output_temp_file):
+                os.remove(output_temp_file)  # Clean up the temp file
+
+    # Re-encode YouTube video with high quality to preserve original resolution
+    check_lease(lost_event)
+    output_temp_file = youtube_output.replace('.mp4', '_temp.mp4')
+    os.rename(youtube_output, output_temp_file)
+    try:
+        subprocess.run(
+            [
+                "ffmpeg", "-i", output_temp_file,
+                "-c:v", "libx264", "-crf", "18",  # CRF 18 ensures high quality
+                "-preset", "slow",
+                youtube_output
+            ],
+            check=True
+        )
+    except subprocess.CalledProcessError as e:
+        print(f"Error during ffmpeg processing for YouTube: {e}")
+        os.rename(output_temp_file, youtube_output)
+    finally:
+        if os.path.exists(output_temp_file):
+            os.remove(output_temp_file)
+
+    return source_frames
+
+def write_atomic(path, payload):
+    # Write then rename, so other nodes never see a half-written file
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(payload, f)
+    os.replace(temp_path, path)
+
+def read_lease(lease_path):
+    try:
+        with open(lease_path) as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+def lease_token(content):
+    try:
+        return json.loads(content)["token"]
+    except (TypeError, ValueError, KeyError):
+        return None
+
+def try_acquire_lease(lease_path, worker_id, token, observed):
+    try:
+        # O_EXCL creation is atomic on local disks and on NFSv3+
+        fd = os.open(lease_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        content = read_lease(lease_path)
+        if content is None:
+            return False  # Released meanwhile; try again on the next pass
+        # Expiry is judged on this node's own clock: the lease is abandoned once its content
+        # (owner, token, heartbeat count) has not changed for LEASE_TIMEOUT seconds
+        now = time.monotonic()
+        seen = observed.get(lease_path)
+        if seen is None or seen[0] != content:
+            observed[lease_path] = (content, now)
+            return False
+        if now - seen[1] < LEASE_TIMEOUT:
+            return False
+        # Expired lease: only the node whose rename succeeds may take it over
+        expired_path = f"{lease_path}.{worker_id}.expired"
+        try:
+            os.rename(lease_path, expired_path)
+        except FileNotFoundError:
+            return False
+        if read_lease(expired_path) != content:
+            # The owner renewed it between our read and the rename; put the live lease back
+            try:
+                os.link(expired_path, lease_path)
+            except FileExistsError:
+                pass
+            os.remove(expired_path)
+            return False
+        os.remove(expired_path)
+        del observed[lease_path]
+        print(f"[{worker_id}] Taking over expired lease {os.path.basename(lease_path)}")
+        return try_acquire_lease(lease_path, worker_id, token, observed)
+    with os.fdopen(fd, "w") as f:
+        json.dump({"worker": worker_id, "token": token, "beat": 0, "heartbeat_at": time.time()}, f)
+    return True
+
+def heartbeat(lease_path, worker_id, token, stop_event, lost_event):
+    beat = 0
+    while not stop_event.wait(HEARTBEAT_INTERVAL):
+        if lease_token(read_lease(lease_path)) != token:
+            lost_event.set()
+            return
+        # A new count every beat, so other nodes see the content change whatever their clocks say
+        beat += 1
+        write_atomic(lease_path, {"worker": worker_id, "token": token, "beat": beat, "heartbeat_at": time.time()})
+
+def clear_folder(folder):
+    for file_name in os.listdir(folder):
+        os.remove(os.path.join(folder, file_name))
+
+def run_worker(folder_path, worker_id):
+    output_folder = os.path.join(folder_path, "redes")
+    lease_folder = os.path.join(output_folder, ".leases")
+    # Each worker renders into its own folder; outputs are published only while the lease is held
+    work_folder = os.path.join(output_folder, ".work", worker_id)
+    os.makedirs(lease_folder, exist_ok=True)
+    os.makedirs(work_folder, exist_ok=True)
+    observed = {}
+
+    def finished(file_name):
+        return any(os.path.exists(os.path.join(lease_folder, f"{file_name}{suffix}")) for suffix in (".done", ".failed"))
+
+    while True:
+        pending = [f for f in sorted(os.listdir(folder_path)) if f.endswith((".mp4", ".avi", ".mov")) and not finished(f)]
+        if not pending:
+            break
+
+        claimed = None
+        token = uuid.uuid4().hex
+        for file_name in pending:
+            lease_path = os.path.join(lease_folder, f"{file_name}.lease")
+            # Re-check after taking the lease: another node may have finished it meanwhile
+            if try_acquire_lease(lease_path, worker_id, token, observed):
+                if finished(file_name):
+                    os.remove(lease_path)
+                    continue
+                claimed = file_name
+                break
+        if claimed is None:
+            # Everything left is leased by live nodes; wait for them or for a lease to expire
+            time.sleep(HEARTBEAT_INTERVAL)
+            continue
+
+        lease_path = os.path.join(lease_folder, f"{claimed}.lease")
+        stop_event = threading.Event()
+        lost_event = threading.Event()
+        beat = threading.Thread(target=heartbeat, args=(lease_path, worker_id, token, stop_event, lost_event), daemon=True)
+        beat.start()
+
+        clear_folder(work_folder)
+        started_at = time.time()
+        source_frames = None
+        error = None
+        try:
+            source_frames = process_video(os.path.join(folder_path, claimed), work_folder, lost_event=lost_event)
+        except LeaseLost:
+            pass
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        finally:
+            stop_event.set()
+            beat.join()
+
+        if lost_event.is_set() or lease_token(read_lease(lease_path)) != token:
+            print(f"[{worker_id}] Lost the lease on {claimed}; leaving it to its new owner")
+            clear_folder(work_folder)
+            continue
+
+        if error is not None:
+            print(f"[{worker_id}] Failed on {claimed}: {error}")
+            clear_folder(work_folder)
+            write_atomic(os.path.join(lease_folder, f"{claimed}.failed"), {
+                "worker": worker_id,
+                "started_at": started_at,
+                "failed_at": time.time(),
+                "error": error,
+            })
+        else:
+            for file_name in os.listdir(work_folder):
+                os.replace(os.path.join(work_folder, file_name), os.path.join(output_folder, file_name))
+            write_atomic(os.path.join(lease_folder, f"{claimed}.done"), {
+                "worker": worker_id,
+                "started_at": started_at,
+                "finished_at": time.time(),
+                "source_frames": source_frames,
+            })
+        os.remove(lease_path)
+
+    os.rmdir(work_folder)
+
+def report_throughput(folder_path):
+    lease_folder = os.path.join(folder_path, "redes", ".leases")
+    records = []
+    for file_name in sorted(os.listdir(lease_folder)):
+        if file_name.endswith(".done"):
+            with open(os.path.join(lease_folder, file_name)) as f:
+                records.append(json.load(f))
+        elif file_name.endswith(".failed"):
+            with open(os.path.join(lease_folder, file_name)) as f:
+                print(f"{file_name[:-len('.failed')]} failed: {json.load(f)['error']}")
+    if not records:
+        return
+    wall = max(r["finished_at"] for r in records) - min(r["started_at"] for r in records)
+    frames = sum(r["source_frames"] for r in records)
+    workers = {r["worker"] for r in records}
+    print(f"{len(records)} videos by {len(workers)} workers in {wall / 60:.1f} minutes")
+    print(f"Aggregate throughput: {frames / max(wall, 1e-6):.0f} source frames/s, {len(records) / max(wall, 1e-6) * 3600:.1f} videos/hour")
+
+def process_folder(folder_path, local_workers):
+    worker_base = f"{socket.gethostname()}-{os.getpid()}"
+    if local_workers == 1:
+        run_worker(folder_path, worker_base)
+    else:
+        # Several processes on this machine, coordinating through the same lease files
+        processes = [multiprocessing.Process(target=run_worker, args=(folder_path, f"{worker_base}-{i}"))
+                     for i in range(local_workers)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+    report_throughput(folder_path)
+    print(f"All videos processed and saved in {os.path.join(folder_path, 'redes')}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Share a folder of videos between workers on one or more machines")
+    parser.add_argument("folder", nargs="?", help="Shared folder with the videos (asks with a dialog if omitted)")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes to start on this machine")
+    args = parser.parse_args()
+
+    folder_path = args.folder or select_folder()
+    if not folder_path:
+        print("No folder selected, exiting.")
+    else:
+        process_folder(folder_path, args.workers)
@@ -0,0 +1,260 @@
+import cv2
+import tkinter as tk
+from tkinter import filedialog
+import os
+import argparse
+import json
+import subprocess
+import time
+import numpy as np
+from tqdm import tqdm
+
+def select_folder():
+    root = tk.Tk()
+    root.withdraw()
+    folder_path = filedialog.askdirectory(title="Select a folder containing video files")
+    return folder_path
+
+def even(value):
+    return int(value) // 2 * 2
+
+def crop_center_square_rect(width, height):
+    # Even-aligned so the rectangle maps exactly onto the half-resolution chroma planes
+    min_dim = even(min(width, height))
+    start_x = even((width - min_dim) // 2)
+    start_y = even((height - min_dim) // 2)
+    return (start_x, start_y, min_dim, min_dim)
+
+def crop_center_vertical_rect(width, height):
+    new_width = even(height * 9 // 16)  # Maintain aspect ratio for 1080x1920
+    start_x = even((width - new_width) // 2)
+    return (start_x, 0, new_width, even(height))
+
+def crop_center_square(frame):
+    height, width = frame.shape[:2]
+    x, y, w, h = crop_center_square_rect(width, height)
+    return frame[y:y+h, x:x+w]
+
+def crop_center_vertical(frame):
+    height, width = frame.shape[:2]
+    x, y, w, h = crop_center_vertical_rect(width, height)
+    return frame[y:y+h, x:x+w]
+
+def split_yuv420(buffer, width, height):
+    # Planar I420: full-resolution Y followed by quarter-size U and V
+    y_size = width * height
+    c_size = y_size // 4
+    y = buffer[:y_size].reshape(height, width)
+    u = buffer[y_size:y_size + c_size].reshape(height // 2, width // 2)
+    v = buffer[y_size + c_size:y_size + 2 * c_size].reshape(height // 2, width // 2)
+    return y, u, v
+
+def crop_yuv420(planes, rect):
+    x, y, w, h = rect
+    luma, u, v = planes
+    return (luma[y:y+h, x:x+w],
+            u[y//2:(y+h)//2, x//2:(x+w)//2],
+            v[y//2:(y+h)//2, x//2:(x+w)//2])
+
+def resize_yuv420(planes, size):
+    width, height = size
+    luma, u, v = planes
+    if (luma.shape[1], luma.shape[0]) == size:
+        return planes
+    return (cv2.resize(luma, (width, height)),
+            cv2.resize(u, (width // 2, height // 2)),
+            cv2.resize(v, (width // 2, height // 2)))
+
+def write_yuv420(encoder, planes):
+    for plane in planes:
+        encoder.stdin.write(np.ascontiguousarray(plane).data)
+
+def calculate_bitrate(target_filesize_mb, duration_seconds):
+    target_filesize_bytes = target_filesize_mb * 1024 * 1024
+    target_bitrate_bps = (target_filesize_bytes * 8) / duration_seconds
+    return int(target_bitrate_bps)
+
+def display_size(stream):
+    # ffmpeg applies the rotation on decode, so phone clips shot upright arrive as height x width
+    rotation = stream.get("tags", {}).get("rotate", 0)
+    for side_data in stream.get("side_data_list", []):
+        rotation = side_data.get("rotation", rotation)
+    width, height = int(stream["width"]), int(stream["height"])
+    if abs(int(float(rotation))) % 180 == 90:
+        return height, width
+    return width, height
+
+def probe(input_path):
+    result = subprocess.run(
+        [
+            "ffprobe", "-v", "error", "-select_streams", "v:0",
+            "-show_entries", "stream=width,height,nb_frames,r_frame_rate:stream_tags=rotate:stream_side_data=rotation:format=duration",
+            "-of", "json", input_path
+        ],
+        capture_output=True, check=True, text=True
+    )
+    info = json.loads(result.stdout)
+    stream = info["streams"][0]
+    num, _, den = stream["r_frame_rate"].partition("/")
+    fps = float(num) / float(den or 1)
+    duration = float(info["format"].get("duration", 0))
+    frame_count = int(stream.get("nb_frames") or duration * fps)
+    return display_size(stream), fps, frame_count
+
+def open_decoder(input_path, size, frames_to_skip=1, pix_fmt="yuv420p"):
+    # Decoded frames stay in the codec's native planar YUV 4:2:0, 1.5 bytes per pixel.
+    # The select filter drops the skipped frames inside ffmpeg, so they never cross the pipe
+    video_filter = f"crop={size[0]}:{size[1]}:0:0"
+    if frames_to_skip > 1:
+        video_filter = f"select='not(mod(n\\,{frames_to_skip}))',{video_filter}"
+    return subprocess.Popen(
+        [
+            "ffmpeg", "-loglevel", "error", "-i", input_path,
+            "-vf", video_filter, "-fps_mode", "passthrough",
+            "-f", "rawvideo", "-pix_fmt", pix_fmt, "pipe:1"
+        ],
+        stdout=subprocess.PIPE
+    )
+
+def open_encoder(output_path, size, fps, codec_args):
+    # rawvideo yuv420p in, so x264 does no colour conversion either
+    return subprocess.Popen(
+        [
+            "ffmpeg", "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "yuv420p",
+            "-s", f"{size[0]}x{size[1]}", "-r", str(fps),
+            "-i", "pipe:0",
+            "-c:v", "libx264",
+        ] + codec_args + [output_path],
+        stdin=subprocess.PIPE
+    )
+
+def process_video(input_path, output_folder, target_duration=60, max_filesize_mb=64):
+    original_resolution, fps, frame_count = probe(input_path)
+    # Odd sizes cannot be split into 2x2 chroma blocks; drop the last row/column
+    width, height = even(original_resolution[0]), even(original_resolution[1])
+    original_duration = frame_count / fps
+    frames_to_skip = max(1, int(original_duration / target_duration))
+
+    # Calculate target bitrate
+    target_bitrate = str(calculate_bitrate(max_filesize_mb, target_duration))
+
+    # Define output filenames
+    base_name = os.path.splitext(os.path.basename(input_path))[0]
+    instagram_output = os.path.join(output_folder, f"{base_name}_instagram_timelapse.mp4")
+    tiktok_output = os.path.join(output_folder, f"{base_name}_tiktok_timelapse.mp4")
+    youtube_output = os.path.join(output_folder, f"{base_name}_youtube_timelapse.mp4")
+
+    social_args = ["-b:v", target_bitrate, "-maxrate", target_bitrate, "-bufsize", target_bitrate]
+    out_instagram = open_encoder(instagram_output, (1080, 1080), fps, social_args)
+    out_tiktok = open_encoder(tiktok_output, (1080, 1920), fps, social_args)
+    out_youtube = open_encoder(youtube_output, (width, height), fps, ["-crf", "18", "-preset", "slow"])
+
+    # Crop rectangles on the 1920x1080 working frame, computed once
+    square_rect = crop_center_square_rect(1920, 1080)
+    vertical_rect = crop_center_vertical_rect(1920, 1080)
+
+    print(f"Processing {input_path}...")
+    print(f"Original Resolution: {original_resolution}")
+    print(f"Original Duration: {original_duration:.2f} seconds")
+    print(f"Target Duration: {target_duration} seconds")
+    print(f"Target Bitrate: {int(target_bitrate) / 1e6:.2f} Mbps")
+    print(f"Frame count: {frame_count}, FPS: {fps}, Frames to skip: {frames_to_skip}")
+
+    # Only the sampled frames come out of the decoder
+    decoder = open_decoder(input_path, (width, height), frames_to_skip)
+    frame_size = width * height * 3 // 2
+    buffer = np.empty(frame_size, dtype=np.uint8)
+
+    with tqdm(total=frame_count // frames_to_skip) as pbar:
+        while decoder.stdout.readinto(buffer) == frame_size:
+            planes = split_yuv420(buffer, width, height)
+            scaled = resize_yuv420(planes, (1920, 1080))
+
+            # Process Instagram video (1080x1080)
+            write_yuv420(out_instagram, resize_yuv420(crop_yuv420(scaled, square_rect), (1080, 1080)))
+
+            # Process TikTok video (1080x1920)
+            write_yuv420(out_tiktok, resize_yuv420(crop_yuv420(scaled, vertical_rect), (1080, 1920)))
+
+            # Process YouTube video (original resolution)
+            out_youtube.stdin.write(buffer.data)
+
+            pbar.update(1)
+
+    decoder.stdout.close()
+    decoder.wait()
+    for output_file, encoder in ((instagram_output, out_instagram), (tiktok_output, out_tiktok), (youtube_output, out_youtube)):
+        encoder.stdin.close()
+        if encoder.wait() != 0:
+            print(f"Error during ffmpeg processing for {output_file}")
+
+def benchmark(input_path, max_frames=300):
+    # Both paths decode with the same ffmpeg process and differ only in the pixel format it hands
+    # over; both do the same crops and resizes and stop where the encoder would take over
+    print(f"Benchmarking {input_path} ({max_frames} frames)...")
+    original_resolution, _, _ = probe(input_path)
+    width, height = even(original_resolution[0]), even(original_resolution[1])
+
+    decoder = open_decoder(input_path, (width, height), pix_fmt="bgr24")
+    bgr_buffer = np.empty((height, width, 3), dtype=np.uint8)
+    frames = 0
+    start = time.time()
+    while frames < max_frames and decoder.stdout.readinto(bgr_buffer) == bgr_buffer.size:
+        frame = bgr_buffer
+        scaled = cv2.resize(frame, (1920, 1080)) if frame.shape[:2] != (1080, 1920) else frame
+        square = cv2.resize(crop_center_square(scaled), (1080, 1080))
+        vertical = cv2.resize(crop_center_vertical(scaled), (1080, 1920))
+        # What the encoder has to do with BGR input
+        for image in (square, vertical, frame):
+            cv2.cvtColor(image, cv2.COLOR_BGR2YUV_I420)
+        frames += 1
+    decoder.kill()
+    decoder.wait()
+    bgr_seconds = time.time() - start
+
+    decoder = open_decoder(input_path, (width, height))
+    buffer = np.empty(width * height * 3 // 2, dtype=np.uint8)
+    square_rect = crop_center_square_rect(1920, 1080)
+    vertical_rect = crop_center_vertical_rect(1920, 1080)
+    yuv_frames = 0
+    start = time.time()
+    while yuv_frames < frames and decoder.stdout.readinto(buffer) == buffer.size:
+        scaled = resize_yuv420(split_yuv420(buffer, width, height), (1920, 1080))
+        resize_yuv420(crop_yuv420(scaled, square_rect), (1080, 1080))
+        resize_yuv420(crop_yuv420(scaled, vertical_rect), (1080, 1920))
+        yuv_frames += 1
+    decoder.kill()
+    decoder.wait()
+    yuv_seconds = time.time() - start
+
+    print(f"BGR path:    {frames / bgr_seconds:7.1f} fps, {bgr_buffer.nbytes / 1e6:.1f} MB per decoded frame")
+    print(f"YUV420 path: {yuv_frames / yuv_seconds:7.1f} fps, {buffer.nbytes / 1e6:.1f} MB per decoded frame")
+    print(f"Speed-up from the pixel format alone (same ffmpeg decoder for both): {(yuv_frames / yuv_seconds) / (frames / bgr_seconds):.2f}x")
+
+def process_folder(folder_path):
+    output_folder = os.path.join(folder_path, "redes")
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+
+    for file_name in os.listdir(folder_path):
+        if file_name.endswith((".mp4", ".avi", ".mov")):
+            file_path = os.path.join(folder_path, file_name)
+            process_video(file_path, output_folder)
+
+    print(f"All videos processed and saved in {output_folder}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Process a folder of videos keeping frames in YUV 4:2:0")
+    parser.add_argument("folder", nargs="?", help="Folder with the videos (asks with a dialog if omitted)")
+    parser.add_argument("--benchmark", metavar="VIDEO", help="Compare the BGR and YUV420 paths on one video")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.benchmark)
+    else:
+        folder_path = args.folder or select_folder()
+        if not folder_path:
+            print("No folder selected, exiting.")
+        else:
+            process_folder(folder_path)
@@ -0,0 +1,315 @@
+import cv2
+import tkinter as tk
+from tkinter import filedialog
+import os
+import subprocess
+import argparse
+import json
+import multiprocessing
+import shutil
+import signal
+import time
+from tqdm import tqdm
+
+# Watchdog: allowed time is a multiple of the source duration plus a fixed margin
+TIMEOUT_PER_SOURCE_SECOND = 3.0
+TIMEOUT_MARGIN = 300
+MAX_RETRIES = 2
+RETRY_DELAY = 30
+# Errors that will fail the same way every time; anything else is retried
+PERMANENT_ERRORS = ("ValueError", "ZeroDivisionError", "UnreadableVideo")
+
+def select_folder():
+    root = tk.Tk()
+    root.withdraw()
+    folder_path = filedialog.askdirectory(title="Select a folder containing video files")
+    return folder_path
+
+def crop_center_square(frame):
+    height, width = frame.shape[:2]
+    min_dim = min(width, height)
+    start_x = (width - min_dim) // 2
+    start_y = (height - min_dim) // 2
+    return frame[start_y:start_y+min_dim, start_x:start_x+min_dim]
+
+def crop_center_vertical(frame):
+    height, width = frame.shape[:2]
+    new_width = height * 9 // 16  # Maintain aspect ratio for 1080x1920
+    start_x = (width - new_width) // 2
+    return frame[:, start_x:start_x+new_width]
+
+def calculate_bitrate(target_filesize_mb, duration_seconds):
+    target_filesize_bytes = target_filesize_mb * 1024 * 1024
+    target_bitrate_bps = (target_filesize_bytes * 8) / duration_seconds
+    return int(target_bitrate_bps)
+
+class UnreadableVideo(Exception):
+    pass
+
+def process_video(input_path, output_folder, target_duration=60, max_filesize_mb=64):
+    cap = cv2.VideoCapture(input_path)
+    
+    # Get video properties
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    original_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    original_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    original_resolution = (original_width, original_height)
+    if not cap.isOpened() or fps <= 0 or frame_count <= 0 or original_width <= 0 or original_height <= 0:
+        cap.release()
+        raise UnreadableVideo(f"Cannot read {input_path} (fps={fps}, frames={frame_count}, size={original_resolution})")
+    original_duration = frame_count / fps
+    frames_to_skip = max(1, int(original_duration / target_duration))
+
+    # Calculate target bitrate
+    target_bitrate = calculate_bitrate(max_filesize_mb, target_duration)
+
+    # Define output filenames
+    base_name = os.path.splitext(os.path.basename(input_path))[0]
+    instagram_output = os.path.join(output_folder, f"{base_name}_instagram_timelapse.mp4")
+    tiktok_output = os.path.join(output_folder, f"{base_name}_tiktok_timelapse.mp4")
+    youtube_output = os.path.join(output_folder, f"{base_name}_youtube_timelapse.mp4")
+
+    # Create VideoWriter objects for Instagram, TikTok, and YouTube videos
+    fourcc = cv2.VideoWriter_fourcc(*'avc1')  # H.264 codec, ensures web compatibility
+    out_instagram = cv2.VideoWriter(instagram_output, fourcc, fps, (1080, 1080))
+    out_tiktok = cv2.VideoWriter(tiktok_output, fourcc, fps, (1080, 1920))
+    out_youtube = cv2.VideoWriter(youtube_output, fourcc, fps, original_resolution)
+
+    current_frame = 0
+    processed_frames = 0
+
+    print(f"Processing {input_path}...")
+    print(f"Original Resolution: {original_resolution}")
+    print(f"Original Duration: {original_duration:.2f} seconds")
+    print(f"Target Duration: {target_duration} seconds")
+    print(f"Target Bitrate: {target_bitrate / 1e6:.2f} Mbps")
+    print(f"Frame count: {frame_count}, FPS: {fps}, Frames to skip: {frames_to_skip}")
+
+    total_frames = frame_count // frames_to_skip
+    update_interval = max(1, total_frames // 20)  # 5% intervals
+
+    with tqdm(total=total_frames) as pbar:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+
+            if current_frame % frames_to_skip == 0:
+                # Scale to 1080p if needed for Instagram and TikTok
+                scaled_frame = cv2.resize(frame, (1920, 1080)) if original_resolution != (1920, 1080) else frame
+                
+                # Process Instagram video (1080x1080)
+                cropped_square = crop_center_square(scaled_frame)
+                resized_square = cv2.resize(cropped_square, (1080, 1080))
+                out_instagram.write(resized_square)
+
+                # Process TikTok video (1080x1920)
+                cropped_vertical = crop_center_vertical(scaled_frame)
+                resized_vertical = cv2.resize(cropped_vertical, (1080, 1920))
+                out_tiktok.write(resized_vertical)
+
+                # Process YouTube video (original resolution)
+                out_youtube.write(frame)  # Use the original frame without resizing
+
+                processed_frames += 1
+
+                # Update progress bar every 5% of total progress
+                if processed_frames % update_interval == 0:
+                    pbar.update(update_interval)
+            
+            current_frame += 1
+
+        # Final update to ensure the progress bar completes
+        if processed_frames % update_interval != 0:
+            pbar.update(total_frames - pbar.n)
+
+    cap.release()
+    out_instagram.release()
+    out_tiktok.release()
+    out_youtube.release()
+
+    # Re-encode Instagram and TikTok videos with the target bitrate using ffmpeg
+    failed_outputs = []
+    for output_file in [instagram_output, tiktok_output]:
+        output_temp_file = output_file.replace('.mp4', '_temp.mp4')
+        os.rename(output_file, output_temp_file)
+        
+        try:
+            subprocess.run(
+                [
+                    "ffmpeg", "-i", output_temp_file, 
+                    "-b:v", str(target_bitrate), 
+                    "-maxrate", str(target_bitrate), 
+                    "-bufsize", str(target_bitrate), 
+                    output_file
+                ],
+                check=True
+            )
+        except subprocess.CalledProcessError as e:
+            print(f"Error during ffmpeg processing: {e}")
+            os.rename(output_temp_file, output_file)  # Restore the original file if ffmpeg fails
+            failed_outputs.append(output_file)
+        finally:
+            if os.path.exists(output_temp_file):
+                os.remove(output_temp_file)  # Clean up the temp file
+
+    # Re-encode YouTube video with high quality to preserve original resolution
+    output_temp_file = youtube_output.replace('.mp4', '_temp.mp4')
+    os.rename(youtube_output, output_temp_file)
+    try:
+        subprocess.run(
+            [
+                "ffmpeg", "-i", output_temp_file,
+                "-c:v", "libx264", "-crf", "18",  # CRF 18 ensures high quality
+                "-preset", "slow",
+                youtube_output
+            ],
+            check=True
+        )
+    except subprocess.CalledProcessError as e:
+        print(f"Error during ffmpeg processing for YouTube: {e}")
+        os.rename(output_temp_file, youtube_output)
+        failed_outputs.append(youtube_output)
+    finally:
+        if os.path.exists(output_temp_file):
+            os.remove(output_temp_file)
+
+    # Report the failure, so the watchdog retries the video instead of counting the uncapped
+    # intermediate as a success
+    if failed_outputs:
+        raise RuntimeError(f"ffmpeg re-encode failed for {', '.join(os.path.basename(f) for f in failed_outputs)}")
+
+def probe_duration(input_path):
+    # ffprobe in its own short-lived process, so a broken file cannot hang the batch here
+    try:
+        result = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "json", input_path],
+            capture_output=True, text=True, timeout=60, check=True
+        )
+        return float(json.loads(result.stdout)["format"]["duration"])
+    except (subprocess.SubprocessError, KeyError, ValueError):
+        return None
+
+def run_isolated(input_path, output_folder, conn):
+    # Own process group, so the watchdog can also kill the ffmpeg children
+    os.setsid()
+    try:
+        process_video(input_path, output_folder)
+        conn.send(("ok", None, None))
+    except Exception as e:
+        conn.send(("error", type(e).__name__, str(e)))
+
+def output_files(input_path, output_folder):
+    base_name = os.path.splitext(os.path.basename(input_path))[0]
+    return [os.path.join(output_folder, f"{base_name}_{name}_timelapse{suffix}.mp4")
+            for name in ("instagram", "tiktok", "youtube") for suffix in ("", "_temp")]
+
+def start_job(job, output_folder):
+    parent_conn, child_conn = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=run_isolated, args=(job["path"], output_folder, child_conn))
+    process.start()
+    child_conn.close()
+    job["process"], job["conn"] = process, parent_conn
+    job["deadline"] = time.time() + job["timeout"]
+    job["attempts"] += 1
+
+def finish_job(job):
+    # Returns (status, error type, message) for a process that has exited or timed out
+    process = job["process"]
+    if process.is_alive():
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        process.join()
+        return "error", "Timeout", f"No result after {job['timeout']:.0f} seconds"
+    process.join()
+    try:
+        if job["conn"].poll():
+            return job["conn"].recv()
+    except EOFError:
+        pass  # Died without sending a result
+    return "error", "Crash", f"Worker exited with code {process.exitcode}"
+
+def quarantine(job, folder_path):
+    quarantine_folder = os.path.join(folder_path, "cuarentena")
+    if not os.path.exists(quarantine_folder):
+        os.makedirs(quarantine_folder)
+    shutil.move(job["path"], os.path.join(quarantine_folder, os.path.basename(job["path"])))
+
+def process_folder(folder_path, parallel_jobs):
+    output_folder = os.path.join(folder_path, "redes")
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+
+    pending = []
+    for file_name in sorted(os.listdir(folder_path)):
+        if file_name.endswith((".mp4", ".avi", ".mov")):
+            file_path = os.path.join(folder_path, file_name)
+            duration = probe_duration(file_path) or 3600  # Unknown: allow a generous slot
+            pending.append({
+                "path": file_path,
+                "timeout": duration * TIMEOUT_PER_SOURCE_SECOND + TIMEOUT_MARGIN,
+                "attempts": 0,
+                "not_before": 0,
+            })
+
+    running = []
+    failures = []
+    succeeded = 0
+
+    while pending or running:
+        # Fill the free slots with jobs whose retry delay has passed
+        now = time.time()
+        for job in [j for j in pending if j["not_before"] <= now][:parallel_jobs - len(running)]:
+            pending.remove(job)
+            start_job(job, output_folder)
+            running.append(job)
+
+        time.sleep(1)
+        for job in list(running):
+            if job["process"].is_alive() and time.time() < job["deadline"]:
+                continue
+            running.remove(job)
+            status, error_type, message = finish_job(job)
+            job["conn"].close()
+            if status == "ok":
+                succeeded += 1
+                continue
+
+            print(f"{os.path.basename(job['path'])} failed (attempt {job['attempts']}): {error_type}: {message}")
+            for partial_file in output_files(job["path"], output_folder):
+                if os.path.exists(partial_file):
+                    os.remove(partial_file)
+
+            permanent = error_type in PERMANENT_ERRORS
+            if not permanent and job["attempts"] <= MAX_RETRIES:
+                job["not_before"] = time.time() + RETRY_DELAY * job["attempts"]
+                pending.append(job)
+                continue
+
+            quarantine(job, folder_path)
+            failures.append((job["path"], "permanent" if permanent else "transient", error_type, message, job["attempts"]))
+
+    print(f"{succeeded} videos processed and saved in {output_folder}")
+    if failures:
+        report_path = os.path.join(output_folder, "failures.txt")
+        with open(report_path, "w") as f:
+            for path, kind, error_type, message, attempts in failures:
+                line = f"{os.path.basename(path)}: {kind} {error_type} after {attempts} attempt(s): {message}"
+                f.write(line + "\n")
+                print(line)
+        print(f"{len(failures)} videos moved to {os.path.join(folder_path, 'cuarentena')}; report in {report_path}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Process a folder of videos, isolating failures per video")
+    parser.add_argument("folder", nargs="?", help="Folder with the videos (asks with a dialog if omitted)")
+    parser.add_argument("--jobs", type=int, default=1, help="Videos processed at once, each in its own process")
+    args = parser.parse_args()
+
+    folder_path = args.folder or select_folder()
+    if not folder_path:
+        print("No folder selected, exiting.")
+    else:
+        process_folder(folder_path, args.jobs)
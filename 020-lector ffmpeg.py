@@ -0,0 +1,230 @@
+import cv2
+import tkinter as tk
+from tkinter import filedialog
+import os
+import json
+import subprocess
+import numpy as np
+from tqdm import tqdm
+
+# Decoder threads for the ffmpeg reader; 0 lets ffmpeg pick
+DECODER_THREADS = 0
+
+def select_folder():
+    root = tk.Tk()
+    root.withdraw()
+    folder_path = filedialog.askdirectory(title="Select a folder containing video files")
+    return folder_path
+
+def crop_center_square(frame):
+    height, width = frame.shape[:2]
+    min_dim = min(width, height)
+    start_x = (width - min_dim) // 2
+    start_y = (height - min_dim) // 2
+    return frame[start_y:start_y+min_dim, start_x:start_x+min_dim]
+
+def crop_center_vertical(frame):
+    height, width = frame.shape[:2]
+    new_width = height * 9 // 16  # Maintain aspect ratio for 1080x1920
+    start_x = (width - new_width) // 2
+    return frame[:, start_x:start_x+new_width]
+
+def calculate_bitrate(target_filesize_mb, duration_seconds):
+    target_filesize_bytes = target_filesize_mb * 1024 * 1024
+    target_bitrate_bps = (target_filesize_bytes * 8) / duration_seconds
+    return int(target_bitrate_bps)
+
+def display_size(stream):
+    # ffmpeg applies the rotation on decode, so phone clips shot upright arrive as height x width
+    rotation = stream.get("tags", {}).get("rotate", 0)
+    for side_data in stream.get("side_data_list", []):
+        rotation = side_data.get("rotation", rotation)
+    width, height = int(stream["width"]), int(stream["height"])
+    if abs(int(float(rotation))) % 180 == 90:
+        return height, width
+    return width, height
+
+def probe_video(input_path):
+    result = subprocess.run(
+        [
+            "ffprobe", "-v", "error", "-select_streams", "v:0",
+            "-show_entries", "stream=width,height,nb_frames,r_frame_rate:stream_tags=rotate:stream_side_data=rotation:format=duration",
+            "-of", "json", input_path
+        ],
+        capture_output=True, check=True, text=True
+    )
+    info = json.loads(result.stdout)
+    stream = info["streams"][0]
+    num, _, den = stream["r_frame_rate"].partition("/")
+    fps = float(num) / float(den or 1)
+    duration = float(info["format"].get("duration", 0))
+    frame_count = int(stream.get("nb_frames") or duration * fps)
+    return display_size(stream), fps, frame_count
+
+class FFmpegReader:
+    # Same read()/release() interface as cv2.VideoCapture, backed by an ffmpeg decode process.
+    # With frames_to_skip the select filter drops frames inside ffmpeg, so they never cross the pipe.
+    def __init__(self, input_path, resolution, frames_to_skip=1, threads=DECODER_THREADS, num_buffers=2):
+        self.width, self.height = resolution
+        video_filter = f"select='not(mod(n\\,{frames_to_skip}))'" if frames_to_skip > 1 else "null"
+        # bufsize=0 gives the raw pipe, so readinto() lands straight in our buffers
+        self.process = subprocess.Popen(
+            [
+                "ffmpeg", "-loglevel", "error", "-threads", str(threads),
+                "-i", input_path,
+                "-vf", video_filter, "-fps_mode", "passthrough",
+                "-f", "rawvideo", "-pix_fmt", "bgr24", "pipe:1"
+            ],
+            stdout=subprocess.PIPE, bufsize=0
+        )
+        self.frame_size = self.width * self.height * 3
+        # A small ring, so the frame handed out last stays valid while the next one is read
+        self.buffers = [bytearray(self.frame_size) for _ in range(num_buffers)]
+        self.frames = [np.frombuffer(b, dtype=np.uint8).reshape(self.height, self.width, 3) for b in self.buffers]
+        self.index = 0
+
+    def read(self):
+        buffer = memoryview(self.buffers[self.index])
+        filled = 0
+        while filled < self.frame_size:
+            count = self.process.stdout.readinto(buffer[filled:])
+            if not count:
+                return False, None
+            filled += count
+        frame = self.frames[self.index]
+        self.index = (self.index + 1) % len(self.buffers)
+        return True, frame
+
+    def release(self):
+        self.process.stdout.close()
+        if self.process.poll() is None:
+            self.process.terminate()
+        self.process.wait()
+
+def process_video(input_path, output_folder, target_duration=60, max_filesize_mb=64):
+    # Get video properties
+    original_resolution, fps, frame_count = probe_video(input_path)
+    original_duration = frame_count / fps
+    frames_to_skip = max(1, int(original_duration / target_duration))
+
+    # Only the sampled frames come out of the reader
+    cap = FFmpegReader(input_path, original_resolution, frames_to_skip)
+
+    # Calculate target bitrate
+    target_bitrate = calculate_bitrate(max_filesize_mb, target_duration)
+
+    # Define output filenames
+    base_name = os.path.splitext(os.path.basename(input_path))[0]
+    instagram_output = os.path.join(output_folder, f"{base_name}_instagram_timelapse.mp4")
+    tiktok_output = os.path.join(output_folder, f"{base_name}_tiktok_timelapse.mp4")
+    youtube_output = os.path.join(output_folder, f"{base_name}_youtube_timelapse.mp4")
+
+    # Create VideoWriter objects for Instagram, TikTok, and YouTube videos
+    fourcc = cv2.VideoWriter_fourcc(*'avc1')  # H.264 codec, ensures web compatibility
+    out_instagram = cv2.VideoWriter(instagram_output, fourcc, fps, (1080, 1080))
+    out_tiktok = cv2.VideoWriter(tiktok_output, fourcc, fps, (1080, 1920))
+    out_youtube = cv2.VideoWriter(youtube_output, fourcc, fps, original_resolution)
+
+    processed_frames = 0
+
+    print(f"Processing {input_path}...")
+    print(f"Original Resolution: {original_resolution}")
+    print(f"Original Duration: {original_duration:.2f} seconds")
+    print(f"Target Duration: {target_duration} seconds")
+    print(f"Target Bitrate: {target_bitrate / 1e6:.2f} Mbps")
+    print(f"Frame count: {frame_count}, FPS: {fps}, Frames to skip: {frames_to_skip}")
+
+    total_frames = frame_count // frames_to_skip
+
+    with tqdm(total=total_frames) as pbar:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+
+            # Scale to 1080p if needed for Instagram and TikTok
+            scaled_frame = cv2.resize(frame, (1920, 1080)) if original_resolution != (1920, 1080) else frame
+
+            # Process Instagram video (1080x1080)
+            cropped_square = crop_center_square(scaled_frame)
+            resized_square = cv2.resize(cropped_square, (1080, 1080))
+            out_instagram.write(resized_square)
+
+            # Process TikTok video (1080x1920)
+            cropped_vertical = crop_center_vertical(scaled_frame)
+            resized_vertical = cv2.resize(cropped_vertical, (1080, 1920))
+            out_tiktok.write(resized_vertical)
+
+            # Process YouTube video (original resolution)
+            out_youtube.write(frame)  # Use the original frame without resizing
+
+            processed_frames += 1
+            pbar.update(1)
+
+    cap.release()
+    out_instagram.release()
+    out_tiktok.release()
+    out_youtube.release()
+
+    # Re-encode Instagram and TikTok videos with the target bitrate using ffmpeg
+    for output_file in [instagram_output, tiktok_output]:
+        output_temp_file = output_file.replace('.mp4', '_temp.mp4')
+        os.rename(output_file, output_temp_file)
+
+        try:
+            subprocess.run(
+                [
+                    "ffmpeg", "-i", output_temp_file,
+                    "-b:v", str(target_bitrate),
+                    "-maxrate", str(target_bitrate),
+                    "-bufsize", str(target_bitrate),
+                    output_file
+                ],
+                check=True
+            )
+        except subprocess.CalledProcessError as e:
+            print(f"Error during ffmpeg processing: {e}")
+            os.rename(output_temp_file, output_file)  # Restore the original file if ffmpeg fails
+        finally:
+            if os.path.exists(output_temp_file):
+                os.remove(output_temp_file)  # Clean up the temp file
+
+    # Re-encode YouTube video with high quality to preserve original resolution
+    output_temp_file = youtube_output.replace('.mp4', '_temp.mp4')
+    os.rename(youtube_output, output_temp_file)
+    try:
+        subprocess.run(
+            [
+                "ffmpeg", "-i", output_temp_file,
+                "-c:v", "libx264", "-crf", "18",  # CRF 18 ensures high quality
+                "-preset", "slow",
+                youtube_output
+            ],
+            check=True
+        )
+    except subprocess.CalledProcessError as e:
+        print(f"Error during ffmpeg processing for YouTube: {e}")
+        os.rename(output_temp_file, youtube_output)
+    finally:
+        if os.path.exists(output_temp_file):
+            os.remove(output_temp_file)
+
+def process_folder():
+    folder_path = select_folder()
+    if not folder_path:
+        print("No folder selected, exiting.")
+        return
+
+    output_folder = os.path.join(folder_path, "redes")
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+
+    for file_name in os.listdir(folder_path):
+        if file_name.endswith((".mp4", ".avi", ".mov")):
+            file_path = os.path.join(folder_path, file_name)
+            process_video(file_path, output_folder)
+
+    print(f"All videos processed and saved in {output_folder}")
+
+if __name__ == "__main__":
+    process_folder()
@@ -0,0 +1,196 @@
+import cv2
+import tkinter as tk
+from tkinter import filedialog
+import os
+import argparse
+import json
+import subprocess
+import time
+import numpy as np
+from tqdm import tqdm
+
+# The recording is considered finished when the file stops growing for this long
+IDLE_TIMEOUT = 5
+
+def select_file():
+    root = tk.Tk()
+    root.withdraw()
+    file_path = filedialog.askopenfilename(title="Select the recording", filetypes=[("Video files", "*.ts;*.mkv;*.mp4;*.mov")])
+    return file_path
+
+def crop_center_square(frame):
+    height, width = frame.shape[:2]
+    min_dim = min(width, height)
+    start_x = (width - min_dim) // 2
+    start_y = (height - min_dim) // 2
+    return frame[start_y:start_y+min_dim, start_x:start_x+min_dim]
+
+def crop_center_vertical(frame):
+    height, width = frame.shape[:2]
+    new_width = height * 9 // 16  # Maintain aspect ratio for 1080x1920
+    start_x = (width - new_width) // 2
+    return frame[:, start_x:start_x+new_width]
+
+def calculate_bitrate(target_filesize_mb, duration_seconds):
+    target_filesize_bytes = target_filesize_mb * 1024 * 1024
+    target_bitrate_bps = (target_filesize_bytes * 8) / duration_seconds
+    return int(target_bitrate_bps)
+
+def parse_rate(rate):
+    # ffprobe reports "0/0" when it does not know the rate
+    num, _, den = (rate or "0/0").partition("/")
+    try:
+        num, den = float(num), float(den or 1)
+    except ValueError:
+        return 0.0
+    return num / den if den else 0.0
+
+def display_size(stream):
+    # ffmpeg applies the rotation on decode, so phone clips shot upright arrive as height x width
+    rotation = stream.get("tags", {}).get("rotate", 0)
+    for side_data in stream.get("side_data_list", []):
+        rotation = side_data.get("rotation", rotation)
+    width, height = int(stream["width"]), int(stream["height"])
+    if abs(int(float(rotation))) % 180 == 90:
+        return height, width
+    return width, height
+
+def probe_stream(input_path, wait=60):
+    # The recorder may not have written the stream headers yet
+    deadline = time.time() + wait
+    while True:
+        result = subprocess.run(
+            [
+                "ffprobe", "-v", "error", "-select_streams", "v:0",
+                "-show_entries", "stream=width,height,r_frame_rate,avg_frame_rate:stream_tags=rotate:stream_side_data=rotation",
+                "-of", "json", input_path
+            ],
+            capture_output=True, text=True
+        )
+        streams = json.loads(result.stdout or "{}").get("streams") if result.returncode == 0 else None
+        if streams:
+            stream = streams[0]
+            # A stream that has only just started may not report a rate yet; keep waiting for it
+            fps = parse_rate(stream.get("r_frame_rate")) or parse_rate(stream.get("avg_frame_rate"))
+            if fps:
+                return display_size(stream), fps
+        if time.time() > deadline:
+            raise ValueError(f"No video stream with a known frame rate found in {input_path}")
+        time.sleep(1)
+
+class FollowReader:
+    # Decodes a file that is still being written. ffmpeg's file protocol keeps reading new data
+    # (-follow 1) and gives up once nothing has arrived for IDLE_TIMEOUT seconds.
+    def __init__(self, input_path, resolution, frames_to_skip):
+        self.width, self.height = resolution
+        video_filter = f"select='not(mod(n\\,{frames_to_skip}))'" if frames_to_skip > 1 else "null"
+        self.process = subprocess.Popen(
+            [
+                "ffmpeg", "-loglevel", "error",
+                "-follow", "1", "-rw_timeout", str(IDLE_TIMEOUT * 1000000),
+                "-i", f"file:{input_path}",
+                "-vf", video_filter, "-fps_mode", "passthrough",
+                "-f", "rawvideo", "-pix_fmt", "bgr24", "pipe:1"
+            ],
+            stdout=subprocess.PIPE, bufsize=0
+        )
+        self.frame_size = self.width * self.height * 3
+        self.buffer = bytearray(self.frame_size)
+        self.frame = np.frombuffer(self.buffer, dtype=np.uint8).reshape(self.height, self.width, 3)
+
+    def read(self):
+        view = memoryview(self.buffer)
+        filled = 0
+        while filled < self.frame_size:
+            count = self.process.stdout.readinto(view[filled:])
+            if not count:
+                return False, None
+            filled += count
+        return True, self.frame
+
+    def release(self):
+        self.process.stdout.close()
+        if self.process.poll() is None:
+            self.process.terminate()
+        self.process.wait()
+
+def open_encoder(output_path, size, fps, codec_args):
+    # Outputs are encoded as frames arrive, so they only need finalising when the recording stops
+    return subprocess.Popen(
+        [
+            "ffmpeg", "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "bgr24",
+            "-s", f"{size[0]}x{size[1]}", "-r", str(fps),
+            "-i", "pipe:0",
+            "-c:v", "libx264", "-pix_fmt", "yuv420p",
+        ] + codec_args + [output_path],
+        stdin=subprocess.PIPE
+    )
+
+def process_video(input_path, output_base, expected_duration, target_duration=60, max_filesize_mb=64):
+    original_resolution, fps = probe_stream(input_path)
+    # The final length is unknown while recording, so the speed-up comes from the expected length
+    frames_to_skip = max(1, int(expected_duration / target_duration))
+
+    # Calculate target bitrate
+    target_bitrate = str(calculate_bitrate(max_filesize_mb, target_duration))
+
+    # Define output filenames
+    instagram_output = f"{output_base}_instagram_timelapse.mp4"
+    tiktok_output = f"{output_base}_tiktok_timelapse.mp4"
+    youtube_output = f"{output_base}_youtube_timelapse.mp4"
+
+    social_args = ["-b:v", target_bitrate, "-maxrate", target_bitrate, "-bufsize", target_bitrate]
+    out_instagram = open_encoder(instagram_output, (1080, 1080), fps, social_args)
+    out_tiktok = open_encoder(tiktok_output, (1080, 1920), fps, social_args)
+    out_youtube = open_encoder(youtube_output, original_resolution, fps, ["-crf", "18", "-preset", "slow"])
+
+    print(f"Following {input_path}...")
+    print(f"Original Resolution: {original_resolution}")
+    print(f"Expected Duration: {expected_duration} seconds")
+    print(f"Target Duration: {target_duration} seconds")
+    print(f"FPS: {fps}, Frames to skip: {frames_to_skip}")
+
+    cap = FollowReader(input_path, original_resolution, frames_to_skip)
+    with tqdm(total=int(expected_duration * fps) // frames_to_skip) as pbar:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+
+            # Scale to 1080p if needed for Instagram and TikTok
+            scaled_frame = cv2.resize(frame, (1920, 1080)) if original_resolution != (1920, 1080) else frame
+
+            # Process Instagram video (1080x1080)
+            out_instagram.stdin.write(cv2.resize(crop_center_square(scaled_frame), (1080, 1080)).tobytes())
+
+            # Process TikTok video (1080x1920)
+            out_tiktok.stdin.write(cv2.resize(crop_center_vertical(scaled_frame), (1080, 1920)).tobytes())
+
+            # Process YouTube video (original resolution)
+            out_youtube.stdin.write(frame.data)
+
+            pbar.update(1)
+    cap.release()
+
+    print(f"No new data for {IDLE_TIMEOUT} seconds, finalising outputs...")
+    finish_start = time.time()
+    for output_file, encoder in ((instagram_output, out_instagram), (tiktok_output, out_tiktok), (youtube_output, out_youtube)):
+        encoder.stdin.close()
+        if encoder.wait() != 0:
+            print(f"Error during ffmpeg processing for {output_file}")
+    print(f"Outputs finalised {time.time() - finish_start:.1f} seconds after the decoder stopped")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render the social cuts while the recording is still being written")
+    parser.add_argument("recording", nargs="?", help="File being recorded (.ts or .mkv work best); asks with a dialog if omitted")
+    parser.add_argument("--expected-duration", type=float, default=3600, help="Expected length of the recording in seconds")
+    args = parser.parse_args()
+
+    video_file = args.recording or select_file()
+    if not video_file:
+        print("No file selected, exiting.")
+    else:
+        output_base = os.path.splitext(video_file)[0]
+        process_video(video_file, output_base, args.expected_duration)
+        print(f"Timelapse videos saved as {output_base}_instagram_timelapse.mp4, {output_base}_tiktok_timelapse.mp4, and {output_base}_youtube_timelapse.mp4")
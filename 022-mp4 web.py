@@ -0,0 +1,275 @@
+import cv2
+import tkinter as tk
+from tkinter import filedialog
+import os
+import subprocess
+import argparse
+import functools
+import struct
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from tqdm import tqdm
+
+# "faststart" reserves room for the moov atom at the start of the file during the encode,
+# "fragmented" writes an empty moov first followed by moof/mdat fragments
+WEB_MP4_MODE = "faststart"
+
+def select_folder():
+    root = tk.Tk()
+    root.withdraw()
+    folder_path = filedialog.askdirectory(title="Select a folder containing video files")
+    return folder_path
+
+def crop_center_square(frame):
+    height, width = frame.shape[:2]
+    min_dim = min(width, height)
+    start_x = (width - min_dim) // 2
+    start_y = (height - min_dim) // 2
+    return frame[start_y:start_y+min_dim, start_x:start_x+min_dim]
+
+def crop_center_vertical(frame):
+    height, width = frame.shape[:2]
+    new_width = height * 9 // 16  # Maintain aspect ratio for 1080x1920
+    start_x = (width - new_width) // 2
+    return frame[:, start_x:start_x+new_width]
+
+def calculate_bitrate(target_filesize_mb, duration_seconds):
+    target_filesize_bytes = target_filesize_mb * 1024 * 1024
+    target_bitrate_bps = (target_filesize_bytes * 8) / duration_seconds
+    return int(target_bitrate_bps)
+
+def web_mp4_args(frame_count):
+    if WEB_MP4_MODE == "fragmented":
+        return ["-movflags", "+frag_keyframe+empty_moov+default_base_moof"]
+    # Sample tables take up to about 24 bytes per frame (stsz, stco, and ctts with B-frames);
+    # reserve twice that. The space is filled in when the encode ends, so there is no second
+    # pass moving the moov atom to the front
+    return ["-moov_size", str(65536 + frame_count * 48)]
+
+def run_web_encode(ffmpeg_args, output_file, frame_count):
+    command = ffmpeg_args + web_mp4_args(frame_count) + [output_file]
+    result = subprocess.run(command, stderr=subprocess.PIPE, text=True)
+    if result.returncode == 0:
+        return
+    if WEB_MP4_MODE != "fragmented" and "reserved_moov_size is too small" in result.stderr:
+        # The moov atom outgrew the reserved space; +faststart moves it in a second pass instead
+        print(f"Reserved moov space too small for {os.path.basename(output_file)}, retrying with -movflags +faststart")
+        if os.path.exists(output_file):
+            os.remove(output_file)
+        subprocess.run(ffmpeg_args + ["-movflags", "+faststart", output_file], check=True)
+        return
+    # Any other failure would fail the same way again; do not encode twice
+    print(result.stderr.strip())
+    raise subprocess.CalledProcessError(result.returncode, command)
+
+def process_video(input_path, output_folder, target_duration=60, max_filesize_mb=64):
+    cap = cv2.VideoCapture(input_path)
+    
+    # Get video properties
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    original_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    original_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    original_resolution = (original_width, original_height)
+    original_duration = frame_count / fps
+    frames_to_skip = max(1, int(original_duration / target_duration))
+
+    # Calculate target bitrate
+    target_bitrate = calculate_bitrate(max_filesize_mb, target_duration)
+
+    # Define output filenames
+    base_name = os.path.splitext(os.path.basename(input_path))[0]
+    instagram_output = os.path.join(output_folder, f"{base_name}_instagram_timelapse.mp4")
+    tiktok_output = os.path.join(output_folder, f"{base_name}_tiktok_timelapse.mp4")
+    youtube_output = os.path.join(output_folder, f"{base_name}_youtube_timelapse.mp4")
+
+    # Create VideoWriter objects for Instagram, TikTok, and YouTube videos
+    fourcc = cv2.VideoWriter_fourcc(*'avc1')  # H.264 codec, ensures web compatibility
+    out_instagram = cv2.VideoWriter(instagram_output, fourcc, fps, (1080, 1080))
+    out_tiktok = cv2.VideoWriter(tiktok_output, fourcc, fps, (1080, 1920))
+    out_youtube = cv2.VideoWriter(youtube_output, fourcc, fps, original_resolution)
+
+    current_frame = 0
+    processed_frames = 0
+
+    print(f"Processing {input_path}...")
+    print(f"Original Resolution: {original_resolution}")
+    print(f"Original Duration: {original_duration:.2f} seconds")
+    print(f"Target Duration: {target_duration} seconds")
+    print(f"Target Bitrate: {target_bitrate / 1e6:.2f} Mbps")
+    print(f"Frame count: {frame_count}, FPS: {fps}, Frames to skip: {frames_to_skip}")
+
+    total_frames = frame_count // frames_to_skip
+    update_interval = total_frames // 20  # 5% intervals
+
+    with tqdm(total=total_frames) as pbar:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+
+            if current_frame % frames_to_skip == 0:
+                # Scale to 1080p if needed for Instagram and TikTok
+                scaled_frame = cv2.resize(frame, (1920, 1080)) if original_resolution != (1920, 1080) else frame
+                
+                # Process Instagram video (1080x1080)
+                cropped_square = crop_center_square(scaled_frame)
+                resized_square = cv2.resize(cropped_square, (1080, 1080))
+                out_instagram.write(resized_square)
+
+                # Process TikTok video (1080x1920)
+                cropped_vertical = crop_center_vertical(scaled_frame)
+                resized_vertical = cv2.resize(cropped_vertical, (1080, 1920))
+                out_tiktok.write(resized_vertical)
+
+                # Process YouTube video (original resolution)
+                out_youtube.write(frame)  # Use the original frame without resizing
+
+                processed_frames += 1
+
+                # Update progress bar every 5% of total progress
+                if processed_frames % update_interval == 0:
+                    pbar.update(update_interval)
+            
+            current_frame += 1
+
+        # Final update to ensure the progress bar completes
+        if processed_frames % update_interval != 0:
+            pbar.update(total_frames - pbar.n)
+
+    cap.release()
+    out_instagram.release()
+    out_tiktok.release()
+    out_youtube.release()
+
+    # Re-encode Instagram and TikTok videos with the target bitrate using ffmpeg
+    for output_file in [instagram_output, tiktok_output]:
+        output_temp_file = output_file.replace('.mp4', '_temp.mp4')
+        os.rename(output_file, output_temp_file)
+        
+        try:
+            run_web_encode(
+                [
+                    "ffmpeg", "-i", output_temp_file, 
+                    "-b:v", str(target_bitrate), 
+                    "-maxrate", str(target_bitrate), 
+                    "-bufsize", str(target_bitrate),
+                ],
+                output_file, processed_frames
+            )
+        except subprocess.CalledProcessError as e:
+            print(f"Error during ffmpeg processing: {e}")
+            os.rename(output_temp_file, output_file)  # Restore the original file if ffmpeg fails
+        finally:
+            if os.path.exists(output_temp_file):
+                os.remove(output_temp_file)  # Clean up the temp file
+
+    # Re-encode YouTube video with high quality to preserve original resolution
+    output_temp_file = youtube_output.replace('.mp4', '_temp.mp4')
+    os.rename(youtube_output, output_temp_file)
+    try:
+        run_web_encode(
+            [
+                "ffmpeg", "-i", output_temp_file,
+                "-c:v", "libx264", "-crf", "18",  # CRF 18 ensures high quality
+                "-preset", "slow",
+            ],
+            youtube_output, processed_frames
+        )
+    except subprocess.CalledProcessError as e:
+        print(f"Error during ffmpeg processing for YouTube: {e}")
+        os.rename(output_temp_file, youtube_output)
+    finally:
+        if os.path.exists(output_temp_file):
+            os.remove(output_temp_file)
+
+def top_level_atoms(path):
+    atoms = []
+    with open(path, "rb") as f:
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                break
+            size, atom_type = struct.unpack(">I4s", header)
+            if size == 1:
+                large_size = f.read(8)
+                if len(large_size) < 8:
+                    raise ValueError(f"Truncated {atom_type.decode('latin-1')} atom header")
+                size = struct.unpack(">Q", large_size)[0]
+                if size < 16:
+                    raise ValueError(f"Corrupt {atom_type.decode('latin-1')} atom size {size}")
+                f.seek(size - 16, os.SEEK_CUR)
+            elif size == 0:
+                atoms.append(atom_type.decode("latin-1"))
+                break  # Atom runs to the end of the file
+            elif size < 8:
+                # Would seek backwards and loop forever
+                raise ValueError(f"Corrupt {atom_type.decode('latin-1')} atom size {size}")
+            else:
+                f.seek(size - 8, os.SEEK_CUR)
+            atoms.append(atom_type.decode("latin-1"))
+    return atoms
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+def time_to_first_frame(path):
+    # Serve the file over local HTTP and time how long ffmpeg needs to decode its first frame
+    folder, file_name = os.path.split(os.path.abspath(path))
+    handler = functools.partial(QuietHandler, directory=folder)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/{file_name}"
+        start = time.time()
+        subprocess.run(["ffmpeg", "-loglevel", "error", "-i", url, "-frames:v", "1", "-f", "null", "-"], check=True)
+        return time.time() - start
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def check_web_mp4(path):
+    try:
+        atoms = top_level_atoms(path)
+    except ValueError as e:
+        print(f"{os.path.basename(path)}: FAIL: {e}")
+        return False
+    # moov (or the first moof of a fragmented file) must come before the media data
+    header_index = min((atoms.index(a) for a in ("moov", "moof") if a in atoms), default=None)
+    ok = "mdat" in atoms and header_index is not None and header_index < atoms.index("mdat")
+    print(f"{os.path.basename(path)}: atoms {' '.join(atoms[:8])}{' ...' if len(atoms) > 8 else ''}")
+    print(f"  {'OK' if ok else 'FAIL'}: moov {'before' if ok else 'not before'} mdat")
+    print(f"  Time to first frame over HTTP: {time_to_first_frame(path) * 1000:.0f} ms")
+    return ok
+
+def process_folder(folder_path):
+    output_folder = os.path.join(folder_path, "redes")
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+
+    for file_name in os.listdir(folder_path):
+        if file_name.endswith((".mp4", ".avi", ".mov")):
+            file_path = os.path.join(folder_path, file_name)
+            process_video(file_path, output_folder)
+
+    print(f"All videos processed and saved in {output_folder}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Process a folder of videos into web-optimized MP4 files")
+    parser.add_argument("folder", nargs="?", help="Folder with the videos (asks with a dialog if omitted)")
+    parser.add_argument("--fragmented", action="store_true", help="Write fragmented MP4 instead of faststart")
+    parser.add_argument("--check", nargs="+", metavar="MP4", help="Check atom order and time to first frame of existing files")
+    args = parser.parse_args()
+
+    if args.fragmented:
+        WEB_MP4_MODE = "fragmented"
+    if args.check:
+        results = [check_web_mp4(path) for path in args.check]
+        raise SystemExit(0 if all(results) else 1)
+    folder_path = args.folder or select_folder()
+    if not folder_path:
+        print("No folder selected, exiting.")
+    else:
+        process_folder(folder_path)
@@ -0,0 +1,179 @@
+import cv2
+import tkinter as tk
+from tkinter import filedialog
+import os
+import json
+import subprocess
+from datetime import datetime
+from tqdm import tqdm
+
+def select_folder():
+    root = tk.Tk()
+    root.withdraw()
+    folder_path = filedialog.askdirectory(title="Select a folder containing video files")
+    return folder_path
+
+def crop_center_square(frame):
+    height, width = frame.shape[:2]
+    min_dim = min(width, height)
+    start_x = (width - min_dim) // 2
+    start_y = (height - min_dim) // 2
+    return frame[start_y:start_y+min_dim, start_x:start_x+min_dim]
+
+def crop_center_vertical(frame):
+    height, width = frame.shape[:2]
+    new_width = height * 9 // 16  # Maintain aspect ratio for 1080x1920
+    start_x = (width - new_width) // 2
+    return frame[:, start_x:start_x+new_width]
+
+def calculate_bitrate(target_filesize_mb, duration_seconds):
+    target_filesize_bytes = target_filesize_mb * 1024 * 1024
+    target_bitrate_bps = (target_filesize_bytes * 8) / duration_seconds
+    return int(target_bitrate_bps)
+
+def clip_timestamp(file_path):
+    # Recording time from the container metadata, or the file's modification time
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-show_entries", "format_tags=creation_time", "-of", "json", file_path],
+        capture_output=True, text=True
+    )
+    try:
+        creation_time = json.loads(result.stdout)["format"]["tags"]["creation_time"]
+        return datetime.fromisoformat(creation_time.replace("Z", "+00:00")).timestamp()
+    except (ValueError, KeyError):
+        return os.path.getmtime(file_path)
+
+def read_clips(folder_path):
+    clips = []
+    for file_name in os.listdir(folder_path):
+        if file_name.endswith((".mp4", ".avi", ".mov")):
+            file_path = os.path.join(folder_path, file_name)
+            cap = cv2.VideoCapture(file_path)
+            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            resolution = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+            cap.release()
+            if fps <= 0 or frame_count <= 0:
+                print(f"Skipping unreadable clip {file_path}")
+                continue
+            clips.append({
+                "path": file_path,
+                "frame_count": frame_count,
+                "fps": fps,
+                "resolution": resolution,
+                "duration": frame_count / fps,
+                "timestamp": clip_timestamp(file_path),
+            })
+    clips.sort(key=lambda clip: clip["timestamp"])
+    return clips
+
+def open_encoder(output_path, size, fps, codec_args):
+    # One encoder per output for the whole compilation; no per-clip files, no concat step
+    return subprocess.Popen(
+        [
+            "ffmpeg", "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "bgr24",
+            "-s", f"{size[0]}x{size[1]}", "-r", str(fps),
+            "-i", "pipe:0",
+            "-c:v", "libx264", "-pix_fmt", "yuv420p",
+        ] + codec_args + [output_path],
+        stdin=subprocess.PIPE
+    )
+
+def process_compilation(clips, output_base, target_duration=60, max_filesize_mb=64):
+    # The first clip sets the frame rate and the YouTube resolution of the compilation
+    fps = clips[0]["fps"]
+    youtube_resolution = clips[0]["resolution"]
+    total_duration = sum(clip["duration"] for clip in clips)
+    target_frames = int(target_duration * fps)
+
+    # Each clip gets a share of the target duration in proportion to its length
+    for clip in clips:
+        clip["output_frames"] = max(1, round(target_frames * clip["duration"] / total_duration))
+        clip["step"] = max(1.0, clip["frame_count"] / clip["output_frames"])
+
+    # Calculate target bitrate
+    target_bitrate = str(calculate_bitrate(max_filesize_mb, target_duration))
+
+    # Define output filenames
+    instagram_output = f"{output_base}_instagram_timelapse.mp4"
+    tiktok_output = f"{output_base}_tiktok_timelapse.mp4"
+    youtube_output = f"{output_base}_youtube_timelapse.mp4"
+
+    social_args = ["-b:v", target_bitrate, "-maxrate", target_bitrate, "-bufsize", target_bitrate]
+    out_instagram = open_encoder(instagram_output, (1080, 1080), fps, social_args)
+    out_tiktok = open_encoder(tiktok_output, (1080, 1920), fps, social_args)
+    out_youtube = open_encoder(youtube_output, youtube_resolution, fps, ["-crf", "18", "-preset", "slow"])
+
+    print(f"Compiling {len(clips)} clips, {total_duration:.2f} seconds in total")
+    print(f"Target Duration: {target_duration} seconds")
+    print(f"Target Bitrate: {int(target_bitrate) / 1e6:.2f} Mbps")
+    for clip in clips:
+        print(f"  {os.path.basename(clip['path'])}: {clip['duration']:.1f} s -> {clip['output_frames']} frames (1 every {clip['step']:.1f})")
+
+    with tqdm(total=sum(clip["output_frames"] for clip in clips)) as pbar:
+        for clip in clips:
+            cap = cv2.VideoCapture(clip["path"])
+            current_frame = 0
+            next_sample = 0.0
+            written = 0
+
+            # Only one decoded frame is alive at a time, whatever the number of clips
+            while written < clip["output_frames"]:
+                if current_frame < int(next_sample):
+                    # grab() skips the conversion for frames we are going to drop
+                    if not cap.grab():
+                        break
+                    current_frame += 1
+                    continue
+
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                current_frame += 1
+                next_sample += clip["step"]
+
+                # Scale to 1080p if needed for Instagram and TikTok
+                scaled_frame = cv2.resize(frame, (1920, 1080)) if clip["resolution"] != (1920, 1080) else frame
+
+                # Process Instagram video (1080x1080)
+                out_instagram.stdin.write(cv2.resize(crop_center_square(scaled_frame), (1080, 1080)).tobytes())
+
+                # Process TikTok video (1080x1920)
+                out_tiktok.stdin.write(cv2.resize(crop_center_vertical(scaled_frame), (1080, 1920)).tobytes())
+
+                # Process YouTube video; clips with another resolution are resized to match the first one
+                youtube_frame = frame if clip["resolution"] == youtube_resolution else cv2.resize(frame, youtube_resolution)
+                out_youtube.stdin.write(youtube_frame.tobytes())
+
+                written += 1
+                pbar.update(1)
+
+            cap.release()
+
+    for output_file, encoder in ((instagram_output, out_instagram), (tiktok_output, out_tiktok), (youtube_output, out_youtube)):
+        encoder.stdin.close()
+        if encoder.wait() != 0:
+            print(f"Error during ffmpeg processing for {output_file}")
+
+def process_folder():
+    folder_path = select_folder()
+    if not folder_path:
+        print("No folder selected, exiting.")
+        return
+
+    output_folder = os.path.join(folder_path, "redes")
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+
+    clips = read_clips(folder_path)
+    if not clips:
+        print("No video clips found, exiting.")
+        return
+
+    output_base = os.path.join(output_folder, f"{os.path.basename(os.path.normpath(folder_path))}_compilation")
+    process_compilation(clips, output_base)
+    print(f"Compilation saved as {output_base}_instagram_timelapse.mp4, {output_base}_tiktok_timelapse.mp4, and {output_base}_youtube_timelapse.mp4")
+
+if __name__ == "__main__":
+    process_folder()
@@ -0,0 +1,244 @@
+import cv2
+import tkinter as tk
+from tkinter import filedialog
+import os
+import subprocess
+import argparse
+import numpy as np
+from tqdm import tqdm
+
+# Logo width as a share of each output's width, and its margin from the bottom-right corner
+LOGO_WIDTH_RATIO = 0.15
+LOGO_MARGIN_RATIO = 0.03
+
+def select_folder():
+    root = tk.Tk()
+    root.withdraw()
+    folder_path = filedialog.askdirectory(title="Select a folder containing video files")
+    return folder_path
+
+def crop_center_square(frame):
+    height, width = frame.shape[:2]
+    min_dim = min(width, height)
+    start_x = (width - min_dim) // 2
+    start_y = (height - min_dim) // 2
+    return frame[start_y:start_y+min_dim, start_x:start_x+min_dim]
+
+def crop_center_vertical(frame):
+    height, width = frame.shape[:2]
+    new_width = height * 9 // 16  # Maintain aspect ratio for 1080x1920
+    start_x = (width - new_width) // 2
+    return frame[:, start_x:start_x+new_width]
+
+def calculate_bitrate(target_filesize_mb, duration_seconds):
+    target_filesize_bytes = target_filesize_mb * 1024 * 1024
+    target_bitrate_bps = (target_filesize_bytes * 8) / duration_seconds
+    return int(target_bitrate_bps)
+
+def load_logo(logo_path):
+    logo = cv2.imread(logo_path, cv2.IMREAD_UNCHANGED)
+    if logo is None:
+        raise ValueError(f"Cannot read logo {logo_path}")
+    if logo.dtype == np.uint16:
+        logo = (logo >> 8).astype(np.uint8)  # 16-bit PNG
+    if logo.ndim == 2:
+        logo = logo[:, :, np.newaxis]
+    if logo.shape[2] <= 2:
+        # Grayscale, with or without alpha
+        alpha = logo[:, :, 1] if logo.shape[2] == 2 else None
+        logo = cv2.cvtColor(np.ascontiguousarray(logo[:, :, 0]), cv2.COLOR_GRAY2BGR)
+        if alpha is not None:
+            logo = np.dstack([logo, alpha])
+    if logo.shape[2] == 3:
+        # No alpha channel: fully opaque
+        logo = np.dstack([logo, np.full(logo.shape[:2], 255, dtype=np.uint8)])
+    return logo
+
+def prepare_overlay(logo, output_size):
+    # Done once per output: scale the logo and premultiply it by its alpha (in 1/256 steps),
+    # so each frame only needs one multiply-add and a shift inside the logo's rectangle
+    output_width, output_height = output_size
+    margin = int(min(output_width, output_height) * LOGO_MARGIN_RATIO)
+    logo_height, logo_width = logo.shape[:2]
+    # Tall logos are limited by the output's height as well, so the logo always fits inside the margins
+    scale = min(output_width * LOGO_WIDTH_RATIO / logo_width, (output_height - 2 * margin) / logo_height)
+    width = max(1, min(int(logo_width * scale), output_width - 2 * margin))
+    height = max(1, min(int(logo_height * scale), output_height - 2 * margin))
+    # Premultiply before resizing, so fully transparent pixels cannot bleed their colour into the edges
+    alpha = logo[:, :, 3:].astype(np.float32) / 255
+    premultiplied = np.dstack([logo[:, :, :3].astype(np.float32) * alpha, alpha])
+    scaled = cv2.resize(premultiplied, (width, height), interpolation=cv2.INTER_AREA)
+    alpha = np.round(scaled[:, :, 3:] * 256).astype(np.uint16)
+    premultiplied = np.round(scaled[:, :, :3] * 256).astype(np.uint16)
+    inverse_alpha = 256 - alpha
+    x = output_width - width - margin
+    y = output_height - height - margin
+    return (slice(y, y + height), slice(x, x + width), premultiplied, inverse_alpha)
+
+def apply_overlay(frame, overlay):
+    # Blend in place, touching only the logo's region of interest
+    rows, cols, premultiplied, inverse_alpha = overlay
+    roi = frame[rows, cols]
+    roi[:] = ((roi * inverse_alpha + premultiplied) >> 8).astype(np.uint8)
+
+def process_video(input_path, output_folder, logo=None, target_duration=60, max_filesize_mb=64):
+    cap = cv2.VideoCapture(input_path)
+    
+    # Get video properties
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    original_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    original_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    original_resolution = (original_width, original_height)
+    original_duration = frame_count / fps
+    frames_to_skip = max(1, int(original_duration / target_duration))
+
+    # Calculate target bitrate
+    target_bitrate = calculate_bitrate(max_filesize_mb, target_duration)
+
+    # Define output filenames
+    base_name = os.path.splitext(os.path.basename(input_path))[0]
+    instagram_output = os.path.join(output_folder, f"{base_name}_instagram_timelapse.mp4")
+    tiktok_output = os.path.join(output_folder, f"{base_name}_tiktok_timelapse.mp4")
+    youtube_output = os.path.join(output_folder, f"{base_name}_youtube_timelapse.mp4")
+
+    # Create VideoWriter objects for Instagram, TikTok, and YouTube videos
+    fourcc = cv2.VideoWriter_fourcc(*'avc1')  # H.264 codec, ensures web compatibility
+    out_instagram = cv2.VideoWriter(instagram_output, fourcc, fps, (1080, 1080))
+    out_tiktok = cv2.VideoWriter(tiktok_output, fourcc, fps, (1080, 1920))
+    out_youtube = cv2.VideoWriter(youtube_output, fourcc, fps, original_resolution)
+
+    # Logo scaled and premultiplied once per output, not per frame
+    if logo is not None:
+        overlay_instagram = prepare_overlay(logo, (1080, 1080))
+        overlay_tiktok = prepare_overlay(logo, (1080, 1920))
+        overlay_youtube = prepare_overlay(logo, original_resolution)
+
+    current_frame = 0
+    processed_frames = 0
+
+    print(f"Processing {input_path}...")
+    print(f"Original Resolution: {original_resolution}")
+    print(f"Original Duration: {original_duration:.2f} seconds")
+    print(f"Target Duration: {target_duration} seconds")
+    print(f"Target Bitrate: {target_bitrate / 1e6:.2f} Mbps")
+    print(f"Frame count: {frame_count}, FPS: {fps}, Frames to skip: {frames_to_skip}")
+
+    total_frames = frame_count // frames_to_skip
+    update_interval = total_frames // 20  # 5% intervals
+
+    with tqdm(total=total_frames) as pbar:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+
+            if current_frame % frames_to_skip == 0:
+                # Scale to 1080p if needed for Instagram and TikTok
+                scaled_frame = cv2.resize(frame, (1920, 1080)) if original_resolution != (1920, 1080) else frame
+                
+                # Process Instagram video (1080x1080)
+                cropped_square = crop_center_square(scaled_frame)
+                resized_square = cv2.resize(cropped_square, (1080, 1080))
+                if logo is not None:
+                    apply_overlay(resized_square, overlay_instagram)
+                out_instagram.write(resized_square)
+
+                # Process TikTok video (1080x1920)
+                cropped_vertical = crop_center_vertical(scaled_frame)
+                resized_vertical = cv2.resize(cropped_vertical, (1080, 1920))
+                if logo is not None:
+                    apply_overlay(resized_vertical, overlay_tiktok)
+                out_tiktok.write(resized_vertical)
+
+                # Process YouTube video (original resolution)
+                # The logo goes onto the decoded frame itself, after the other outputs have used it
+                if logo is not None:
+                    apply_overlay(frame, overlay_youtube)
+                out_youtube.write(frame)  # Use the original frame without resizing
+
+                processed_frames += 1
+
+                # Update progress bar every 5% of total progress
+                if processed_frames % update_interval == 0:
+                    pbar.update(update_interval)
+            
+            current_frame += 1
+
+        # Final update to ensure the progress bar completes
+        if processed_frames % update_interval != 0:
+            pbar.update(total_frames - pbar.n)
+
+    cap.release()
+    out_instagram.release()
+    out_tiktok.release()
+    out_youtube.release()
+
+    # Re-encode Instagram and TikTok videos with the target bitrate using ffmpeg
+    for output_file in [instagram_output, tiktok_output]:
+        output_temp_file = output_file.replace('.mp4', '_temp.mp4')
+        os.rename(output_file, output_temp_file)
+        
+        try:
+            subprocess.run(
+                [
+                    "ffmpeg", "-i", output_temp_file, 
+                    "-b:v", str(target_bitrate), 
+                    "-maxrate", str(target_bitrate), 
+                    "-bufsize", str(target_bitrate), 
+                    output_file
+                ],
+                check=True
+            )
+        except subprocess.CalledProcessError as e:
+            print(f"Error during ffmpeg processing: {e}")
+            os.rename(output_temp_file, output_file)  # Restore the original file if ffmpeg fails
+        finally:
+            if os.path.exists(output_temp_file):
+                os.remove(output_temp_file)  # Clean up the temp file
+
+    # Re-encode YouTube video with high quality to preserve original resolution
+    output_temp_file = youtube_output.replace('.mp4', '_temp.mp4')
+    os.rename(youtube_output, output_temp_file)
+    try:
+        subprocess.run(
+            [
+                "ffmpeg", "-i", output_temp_file,
+                "-c:v", "libx264", "-crf", "18",  # CRF 18 ensures high quality
+                "-preset", "slow",
+                youtube_output
+            ],
+            check=True
+        )
+    except subprocess.CalledProcessError as e:
+        print(f"Error during ffmpeg processing for YouTube: {e}")
+        os.rename(output_temp_file, youtube_output)
+    finally:
+        if os.path.exists(output_temp_file):
+            os.remove(output_temp_file)
+
+def process_folder(folder_path, logo_path=None):
+    output_folder = os.path.join(folder_path, "redes")
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+
+    logo = load_logo(logo_path) if logo_path else None
+
+    for file_name in os.listdir(folder_path):
+        if file_name.endswith((".mp4", ".avi", ".mov")):
+            file_path = os.path.join(folder_path, file_name)
+            process_video(file_path, output_folder, logo)
+
+    print(f"All videos processed and saved in {output_folder}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Process a folder of videos and brand them with a logo")
+    parser.add_argument("folder", nargs="?", help="Folder with the videos (asks with a dialog if omitted)")
+    parser.add_argument("--logo", help="PNG logo (with transparency) placed in the bottom-right corner")
+    args = parser.parse_args()
+
+    folder_path = args.folder or select_folder()
+    if not folder_path:
+        print("No folder selected, exiting.")
+    else:
+        process_folder(folder_path, args.logo)
@@ -0,0 +1,292 @@
+import cv2
+import tkinter as tk
+from tkinter import filedialog
+import os
+import subprocess
+import argparse
+import fcntl
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from tqdm import tqdm
+
+SCRATCH_DIR = os.environ.get("TIMELAPSE_SCRATCH_DIR", os.path.join(tempfile.gettempdir(), "timelapse_scratch"))
+# Large sequential reads keep the NAS streaming instead of seeking between small requests
+READ_CHUNK = 8 * 1024 * 1024
+# Readers allowed on one storage device at once, shared by every job on this machine
+MAX_READERS_PER_DEVICE = 1
+
+def select_folder():
+    root = tk.Tk()
+    root.withdraw()
+    folder_path = filedialog.askdirectory(title="Select a folder containing video files")
+    return folder_path
+
+def crop_center_square(frame):
+    height, width = frame.shape[:2]
+    min_dim = min(width, height)
+    start_x = (width - min_dim) // 2
+    start_y = (height - min_dim) // 2
+    return frame[start_y:start_y+min_dim, start_x:start_x+min_dim]
+
+def crop_center_vertical(frame):
+    height, width = frame.shape[:2]
+    new_width = height * 9 // 16  # Maintain aspect ratio for 1080x1920
+    start_x = (width - new_width) // 2
+    return frame[:, start_x:start_x+new_width]
+
+def calculate_bitrate(target_filesize_mb, duration_seconds):
+    target_filesize_bytes = target_filesize_mb * 1024 * 1024
+    target_bitrate_bps = (target_filesize_bytes * 8) / duration_seconds
+    return int(target_bitrate_bps)
+
+class DeviceSlot:
+    # A reader slot on a storage device, held with flock so separate processes share the limit
+    def __init__(self, path):
+        self.device = os.stat(path).st_dev
+        self.lock_file = None
+
+    def __enter__(self):
+        start = time.time()
+        while self.lock_file is None:
+            for slot in range(MAX_READERS_PER_DEVICE):
+                lock_file = open(os.path.join(tempfile.gettempdir(), f"timelapse_io_{self.device}_{slot}.lock"), "w")
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    self.lock_file = lock_file
+                    break
+                except BlockingIOError:
+                    lock_file.close()
+            else:
+                time.sleep(0.5)
+        self.waited = time.time() - start
+        return self
+
+    def __exit__(self, *exc):
+        fcntl.flock(self.lock_file, fcntl.LOCK_UN)
+        self.lock_file.close()
+        self.lock_file = None
+
+def open_sequential(path):
+    # The hint only applies to reads through this fd: a larger read-ahead window for the copy
+    fd = os.open(path, os.O_RDONLY)
+    if hasattr(os, "posix_fadvise"):
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+    return fd
+
+def stage_to_scratch(file_path):
+    # Copy the source onto local disk with large sequential reads while the previous file encodes
+    size = os.path.getsize(file_path)
+    if not os.path.exists(SCRATCH_DIR):
+        os.makedirs(SCRATCH_DIR)
+    if shutil.disk_usage(SCRATCH_DIR).free < size * 1.1:
+        return {"path": file_path, "staged": False, "read_seconds": 0.0, "slot_wait": 0.0}
+
+    with DeviceSlot(file_path) as slot:
+        start = time.time()
+        # Unique name, so jobs sharing the scratch folder never write over each other's copies
+        target_fd, local_path = tempfile.mkstemp(dir=SCRATCH_DIR, suffix=os.path.splitext(file_path)[1])
+        try:
+            with os.fdopen(target_fd, "wb") as target, os.fdopen(open_sequential(file_path), "rb", buffering=0) as source:
+                buffer = bytearray(READ_CHUNK)
+                view = memoryview(buffer)
+                while True:
+                    count = source.readinto(buffer)
+                    if not count:
+                        break
+                    target.write(view[:count])
+        except BaseException:
+            if os.path.exists(local_path):
+                os.remove(local_path)
+            raise
+        read_seconds = time.time() - start
+    return {"path": local_path, "staged": True, "read_seconds": read_seconds, "slot_wait": slot.waited}
+
+def process_video(input_path, output_folder, target_duration=60, max_filesize_mb=64, output_name=None):
+    cap = cv2.VideoCapture(input_path)
+    
+    # Get video properties
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    original_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    original_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    original_resolution = (original_width, original_height)
+    original_duration = frame_count / fps
+    frames_to_skip = max(1, int(original_duration / target_duration))
+
+    # Calculate target bitrate
+    target_bitrate = calculate_bitrate(max_filesize_mb, target_duration)
+
+    # Define output filenames
+    # A staged copy has a scratch name; the outputs are named after the original file
+    base_name = os.path.splitext(os.path.basename(output_name or input_path))[0]
+    instagram_output = os.path.join(output_folder, f"{base_name}_instagram_timelapse.mp4")
+    tiktok_output = os.path.join(output_folder, f"{base_name}_tiktok_timelapse.mp4")
+    youtube_output = os.path.join(output_folder, f"{base_name}_youtube_timelapse.mp4")
+
+    # Create VideoWriter objects for Instagram, TikTok, and YouTube videos
+    fourcc = cv2.VideoWriter_fourcc(*'avc1')  # H.264 codec, ensures web compatibility
+    out_instagram = cv2.VideoWriter(instagram_output, fourcc, fps, (1080, 1080))
+    out_tiktok = cv2.VideoWriter(tiktok_output, fourcc, fps, (1080, 1920))
+    out_youtube = cv2.VideoWriter(youtube_output, fourcc, fps, original_resolution)
+
+    current_frame = 0
+    processed_frames = 0
+
+    print(f"Processing {input_path}...")
+    print(f"Original Resolution: {original_resolution}")
+    print(f"Original Duration: {original_duration:.2f} seconds")
+    print(f"Target Duration: {target_duration} seconds")
+    print(f"Target Bitrate: {target_bitrate / 1e6:.2f} Mbps")
+    print(f"Frame count: {frame_count}, FPS: {fps}, Frames to skip: {frames_to_skip}")
+
+    total_frames = frame_count // frames_to_skip
+    update_interval = total_frames // 20  # 5% intervals
+
+    with tqdm(total=total_frames) as pbar:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+
+            if current_frame % frames_to_skip == 0:
+                # Scale to 1080p if needed for Instagram and TikTok
+                scaled_frame = cv2.resize(frame, (1920, 1080)) if original_resolution != (1920, 1080) else frame
+                
+                # Process Instagram video (1080x1080)
+                cropped_square = crop_center_square(scaled_frame)
+                resized_square = cv2.resize(cropped_square, (1080, 1080))
+                out_instagram.write(resized_square)
+
+                # Process TikTok video (1080x1920)
+                cropped_vertical = crop_center_vertical(scaled_frame)
+                resized_vertical = cv2.resize(cropped_vertical, (1080, 1920))
+                out_tiktok.write(resized_vertical)
+
+                # Process YouTube video (original resolution)
+                out_youtube.write(frame)  # Use the original frame without resizing
+
+                processed_frames += 1
+
+                # Update progress bar every 5% of total progress
+                if processed_frames % update_interval == 0:
+                    pbar.update(update_interval)
+            
+            current_frame += 1
+
+        # Final update to ensure the progress bar completes
+        if processed_frames % update_interval != 0:
+            pbar.update(total_frames - pbar.n)
+
+    cap.release()
+    out_instagram.release()
+    out_tiktok.release()
+    out_youtube.release()
+
+    # Re-encode Instagram and TikTok videos with the target bitrate using ffmpeg
+    for output_file in [instagram_output, tiktok_output]:
+        output_temp_file = output_file.replace('.mp4', '_temp.mp4')
+        os.rename(output_file, output_temp_file)
+        
+        try:
+            subprocess.run(
+                [
+                    "ffmpeg", "-i", output_temp_file, 
+                    "-b:v", str(target_bitrate), 
+                    "-maxrate", str(target_bitrate), 
+                    "-bufsize", str(target_bitrate), 
+                    output_file
+                ],
+                check=True
+            )
+        except subprocess.CalledProcessError as e:
+            print(f"Error during ffmpeg processing: {e}")
+            os.rename(output_temp_file, output_file)  # Restore the original file if ffmpeg fails
+        finally:
+            if os.path.exists(output_temp_file):
+                os.remove(output_temp_file)  # Clean up the temp file
+
+    # Re-encode YouTube video with high quality to preserve original resolution
+    output_temp_file = youtube_output.replace('.mp4', '_temp.mp4')
+    os.rename(youtube_output, output_temp_file)
+    try:
+        subprocess.run(
+            [
+                "ffmpeg", "-i", output_temp_file,
+                "-c:v", "libx264", "-crf", "18",  # CRF 18 ensures high quality
+                "-preset", "slow",
+                youtube_output
+            ],
+            check=True
+        )
+    except subprocess.CalledProcessError as e:
+        print(f"Error during ffmpeg processing for YouTube: {e}")
+        os.rename(output_temp_file, youtube_output)
+    finally:
+        if os.path.exists(output_temp_file):
+            os.remove(output_temp_file)
+
+def process_folder(folder_path):
+    output_folder = os.path.join(folder_path, "redes")
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+
+    video_files = [os.path.join(folder_path, f) for f in sorted(os.listdir(folder_path))
+                   if f.endswith((".mp4", ".avi", ".mov"))]
+
+    total_stall = 0.0
+    total_slot_wait = 0.0
+    batch_start = time.time()
+
+    with ThreadPoolExecutor(max_workers=1) as prefetcher:
+        next_stage = prefetcher.submit(stage_to_scratch, video_files[0]) if video_files else None
+        for index, file_path in enumerate(video_files):
+            # Stall: time the encoder sits idle waiting for its input to arrive
+            wait_start = time.time()
+            staged = next_stage.result()
+            stall = time.time() - wait_start
+
+            # Start fetching the next file before this one is decoded
+            next_stage = prefetcher.submit(stage_to_scratch, video_files[index + 1]) if index + 1 < len(video_files) else None
+
+            if staged["staged"]:
+                try:
+                    process_video(staged["path"], output_folder, output_name=file_path)
+                finally:
+                    os.remove(staged["path"])
+            else:
+                # No scratch space: decode straight from the share. The decoder opens the file itself,
+                # so this path gets no read-ahead hint, only the reader-slot throttle
+                with DeviceSlot(file_path) as slot:
+                    staged["slot_wait"] = slot.waited
+                    process_video(file_path, output_folder)
+
+            total_stall += stall
+            total_slot_wait += staged["slot_wait"]
+            size_mb = os.path.getsize(file_path) / 1024 / 1024
+            if staged["staged"]:
+                rate = size_mb / max(staged["read_seconds"], 1e-6)
+                print(f"I/O {os.path.basename(file_path)}: staged {size_mb:.0f} MB at {rate:.0f} MB/s, "
+                      f"waited {staged['slot_wait']:.1f} s for a reader slot, encoder stalled {stall:.1f} s")
+            else:
+                print(f"I/O {os.path.basename(file_path)}: read in place (not enough scratch space), encoder stalled {stall:.1f} s")
+
+    elapsed = time.time() - batch_start
+    print(f"I/O stall: {total_stall:.1f} s of {elapsed:.1f} s ({total_stall / max(elapsed, 1e-6) * 100:.1f}%), "
+          f"reader slot waits: {total_slot_wait:.1f} s")
+    print(f"All videos processed and saved in {output_folder}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Process a folder of videos on network storage with read-ahead")
+    parser.add_argument("folder", nargs="?", help="Folder with the videos (asks with a dialog if omitted)")
+    parser.add_argument("--readers-per-device", type=int, default=MAX_READERS_PER_DEVICE,
+                        help="Concurrent readers allowed on one storage device across all jobs")
+    args = parser.parse_args()
+
+    MAX_READERS_PER_DEVICE = max(1, args.readers_per_device)
+    folder_path = args.folder or select_folder()
+    if not folder_path:
+        print("No folder selected, exiting.")
+    else:
+        process_folder(folder_path)